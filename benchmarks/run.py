@@ -0,0 +1,378 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import identity
+from benchmarks.synthetic import iter_ledger, statement_transactions, write_statement_pdf
+
+BUNDLED_STATEMENTS = ["PhonePe_Statement_Feb2025_Apr2025.pdf", "PhonePe_Statement_Mar2025_Apr2025_removed.pdf"]
+SECTIONS = ("ledger", "statements", "blockchain")
+# The synthetic ledger's owner; requests are signed as this user.
+BENCH_USER = "bench"
+# Leaf names ending in these are compared between runs; the rest is context.
+LOWER_IS_BETTER = ("_ms", "seconds")
+HIGHER_IS_BETTER = ("per_second",)
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    ordered = sorted(samples)
+    return {
+        "samples": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+def time_requests(client, url: str, repeat: int, warmup: int = 3) -> Dict[str, Any]:
+    for _ in range(warmup):
+        client.get(url)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url)
+        samples.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {url} returned {response.status_code}")
+    return summarize(samples)
+
+
+def load_app(workdir: str):
+    # The backend is imported into a scratch directory on the embedded SQLite
+    # store, so a run needs no database server and leaves the checkout alone.
+    os.environ.update({
+        "STORAGE_BACKEND": "sqlite",
+        "SQLITE_PATH": os.path.join(workdir, "bench.db"),
+        "CATEGORY_MODEL_PATH": os.path.join(workdir, "category_model.pkl"),
+        "CATEGORY_RETRAIN_INTERVAL": "86400",
+        "IMPORT_SPOOL_DIR": os.path.join(workdir, "spool"),
+        "OCR_CACHE_PATH": "",
+        "OCR_WARM_START": "0",
+        "USER_AUTH_SECRET": os.urandom(16).hex(),
+    })
+    os.chdir(workdir)
+    import app
+    return app
+
+
+def grow_ledger(app_module, start: int, rows: int, seed: int, batch_size: int = 10000) -> Dict[str, Any]:
+    import records
+    import rollups
+
+    storage = app_module.storage
+    started = time.perf_counter()
+    batch = []
+    user_id = BENCH_USER
+    for expense in iter_ledger(rows, seed, start=start):
+        expense["user_id"] = user_id
+        expense["category_source"] = "user"
+        expense["block_hash"] = "N/A"
+        batch.append(records.normalize_expense(expense))
+        if len(batch) >= batch_size:
+            storage.insert_expenses(batch)
+            rollups.apply_expenses(storage, batch)
+            batch = []
+    if batch:
+        storage.insert_expenses(batch)
+        rollups.apply_expenses(storage, batch)
+    app_module.bump_data_version(user_id)
+    seconds = time.perf_counter() - started
+    return {"rows_added": rows, "seconds": round(seconds, 3), "rows_per_second": round(rows / seconds) if seconds else None}
+
+
+class SignedClient:
+    """Flask test client that signs every request as ``user_id``, the way the frontend does."""
+
+    def __init__(self, app_module, user_id: str):
+        self.client = app_module.app.test_client()
+        self.secret = app_module.USER_AUTH_SECRET
+        self.user_id = user_id
+
+    def get(self, url: str, **kwargs):
+        return self.client.get(url, headers=identity.sign(self.secret, self.user_id), **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.client.post(url, headers=identity.sign(self.secret, self.user_id), **kwargs)
+
+
+def bench_add_expense(client, requests: int, seed: int) -> Dict[str, Any]:
+    samples = []
+    started = time.perf_counter()
+    for expense in iter_ledger(requests, seed + 1):
+        begun = time.perf_counter()
+        response = client.post("/add_expense", json=expense)
+        samples.append(time.perf_counter() - begun)
+        if response.status_code != 200 or "expense_id" not in response.get_json():
+            raise RuntimeError(f"POST /add_expense failed: {response.status_code} {response.get_data(as_text=True)[:200]}")
+    elapsed = time.perf_counter() - started
+    return {"requests": requests, "requests_per_second": round(requests / elapsed, 1), **summarize(samples)}
+
+
+def bench_ledger(sizes: List[int], seed: int, repeat: int, add_requests: int, workdir: str) -> List[Dict[str, Any]]:
+    """Grow one synthetic ledger through ``sizes`` and time the read and write paths at each size."""
+    app_module = load_app(workdir)
+    client = SignedClient(app_module, BENCH_USER)
+    results = []
+    loaded = 0
+    added = 0
+    for size in sorted(sizes):
+        result: Dict[str, Any] = {"rows": size}
+        try:
+            result["load"] = grow_ledger(app_module, loaded, size - loaded, seed)
+            loaded = size
+            result["history_first_page"] = time_requests(client, "/history?limit=50", repeat)
+            result["history_date_range"] = time_requests(client, "/history?limit=50&start_date=2024-06-01&end_date=2024-06-30", repeat)
+            # A page well into the ledger, reached the way a client would.
+            cursor = None
+            for _ in range(10):
+                page = client.get("/history?limit=50" + (f"&cursor={cursor}" if cursor else "")).get_json()
+                cursor = page["next_cursor"] or cursor
+            result["history_deep_page"] = time_requests(client, f"/history?limit=50&cursor={cursor}", repeat)
+            result["savings_trend"] = time_requests(client, "/analytics/savings_trend", repeat)
+            result["add_expense"] = bench_add_expense(client, add_requests, seed + added)
+            added += add_requests
+        except Exception as e:
+            traceback.print_exc()
+            result["error"] = f"{type(e).__name__}: {e}"
+        results.append(result)
+    app_module.sealer.flush()
+    return results
+
+
+def _time_statement(path: str, force_ocr: bool) -> Dict[str, Any]:
+    import statement_pipeline
+
+    started = time.perf_counter()
+    transactions = 0
+    sources = Counter()
+    pages = 0
+    if force_ocr:
+        total = statement_pipeline.page_count(path)
+        for _page_no, text in statement_pipeline.iter_ocr_pages(path, list(range(1, total + 1))):
+            transactions += len(statement_pipeline.parse_transactions(text)[0])
+            sources["ocr"] += 1
+            pages += 1
+    else:
+        for page in statement_pipeline.stream_statement(path):
+            transactions += len(page["transactions"])
+            sources[page["source"]] += 1
+            pages += 1
+    seconds = time.perf_counter() - started
+    return {
+        "pages": pages,
+        "transactions": transactions,
+        "sources": dict(sources),
+        "seconds": round(seconds, 4),
+        "transactions_per_second": round(transactions / seconds, 1) if seconds else None,
+    }
+
+
+def bench_statements(synthetic_sizes: List[int], seed: int, force_ocr: bool, workdir: str) -> List[Dict[str, Any]]:
+    statements = [(name, os.path.join(REPO_ROOT, name)) for name in BUNDLED_STATEMENTS]
+    for count in synthetic_sizes:
+        path = os.path.join(workdir, f"synthetic_{count}.pdf")
+        write_statement_pdf(path, statement_transactions(count, seed))
+        statements.append((f"synthetic_{count}", path))
+    results = []
+    for name, path in statements:
+        result: Dict[str, Any] = {"statement": name}
+        try:
+            result.update(_time_statement(path, force_ocr))
+        except Exception as e:
+            traceback.print_exc()
+            result["error"] = f"{type(e).__name__}: {e}"
+        results.append(result)
+    return results
+
+
+def bench_blockchain(lengths: List[int], transactions_per_block: int, build_difficulty: int, pow_blocks: int, workdir: str) -> Dict[str, Any]:
+    """Time proof_of_work at the chain's own difficulty and is_chain_valid over stored chains.
+
+    Validation chains are mined at ``build_difficulty`` so long chains can be
+    built quickly; checking a block costs the same whatever its difficulty.
+    """
+    from blockchain import Blockchain
+    from mining import MiningEngine
+    from storage import SQLiteStorage
+
+    # Mined the way app.py configures it, so MINING_WORKERS applies here too.
+    miner = MiningEngine(workers=int(os.environ.get("MINING_WORKERS", "0")) or None)
+    chain = Blockchain(miner=miner)
+    previous_proof = chain.get_latest_block()["proof"]
+    samples = []
+    try:
+        for _ in range(pow_blocks):
+            started = time.perf_counter()
+            previous_proof = chain.proof_of_work(previous_proof)
+            samples.append(time.perf_counter() - started)
+    finally:
+        miner.shutdown()
+    proof_of_work = {"difficulty": chain.difficulty, "workers": miner.workers, **summarize(samples)}
+
+    validation = []
+    for length in sorted(lengths):
+        storage = SQLiteStorage(os.path.join(workdir, f"chain_{length}.db"))
+        chain = Blockchain(store=storage.chain)
+        chain.difficulty = build_difficulty
+        started = time.perf_counter()
+        for index in range(length - 1):
+            chain.add_transactions([
+                {"expense_id": f"{index}-{position}", "data": json.dumps({"amount": position, "description": "Paid to Zomato"}), "timestamp": "2025-01-01 00:00:00"}
+                for position in range(transactions_per_block)
+            ])
+        built = time.perf_counter() - started
+        started = time.perf_counter()
+        full_valid = chain.is_chain_valid()
+        full_seconds = time.perf_counter() - started
+        # With a signed checkpoint at the tip, only the new block is re-checked.
+        chain.add_transactions([{"expense_id": "tail", "data": "{}", "timestamp": "2025-01-01 00:00:00"}])
+        started = time.perf_counter()
+        incremental_valid = chain.is_chain_valid()
+        incremental_seconds = time.perf_counter() - started
+        storage.close()
+        validation.append({
+            "length": length,
+            "transactions_per_block": transactions_per_block,
+            "build_seconds": round(built, 3),
+            "valid": full_valid and incremental_valid,
+            "full_validation_seconds": round(full_seconds, 4),
+            "blocks_per_second": round(length / full_seconds) if full_seconds else None,
+            "incremental_validation_seconds": round(incremental_seconds, 4),
+        })
+    return {"proof_of_work": proof_of_work, "is_chain_valid": validation}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def benchmark(sections: List[str], rows: List[int], seed: int = 0, repeat: int = 30, add_requests: int = 200,
+              statement_sizes: Optional[List[int]] = None, force_ocr: bool = False, chain_lengths: Optional[List[int]] = None,
+              transactions_per_block: int = 20, build_difficulty: int = 2, pow_blocks: int = 5) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix="expense-bench-")
+    cwd = os.getcwd()
+    started = time.perf_counter()
+    report: Dict[str, Any] = {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seed": seed,
+        }
+    }
+    try:
+        if "blockchain" in sections:
+            report["blockchain"] = bench_blockchain(chain_lengths or [100, 1000, 5000], transactions_per_block, build_difficulty, pow_blocks, workdir)
+        if "statements" in sections:
+            report["statements"] = bench_statements(statement_sizes or [100, 1000], seed, force_ocr, workdir)
+        if "ledger" in sections:
+            report["ledger"] = bench_ledger(rows, seed, repeat, add_requests, workdir)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    report["meta"]["seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def _flatten(node: Any, path: str = "") -> Dict[str, float]:
+    values = {}
+    if isinstance(node, dict):
+        for key, value in node.items():
+            values.update(_flatten(value, f"{path}.{key}" if path else key))
+    elif isinstance(node, list):
+        for position, item in enumerate(node):
+            label = position
+            if isinstance(item, dict):
+                label = item.get("rows", item.get("statement", item.get("length", position)))
+            values.update(_flatten(item, f"{path}[{label}]"))
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        values[path] = node
+    return values
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.1) -> Dict[str, Any]:
+    """List metrics that moved by more than ``threshold`` (as a fraction) between two reports."""
+    before = _flatten({key: value for key, value in baseline.items() if key != "meta"})
+    after = _flatten({key: value for key, value in current.items() if key != "meta"})
+    regressions = []
+    improvements = []
+    for path in sorted(before.keys() & after.keys()):
+        old, new = before[path], after[path]
+        if not old:
+            continue
+        if path.endswith(HIGHER_IS_BETTER):
+            change = (old - new) / old
+        elif path.endswith(LOWER_IS_BETTER):
+            change = (new - old) / old
+        else:
+            continue
+        entry = {"metric": path, "baseline": old, "current": new, "change": round(change, 4)}
+        if change > threshold:
+            regressions.append(entry)
+        elif change < -threshold:
+            improvements.append(entry)
+    return {
+        "baseline_commit": baseline.get("meta", {}).get("commit"),
+        "threshold": threshold,
+        "regressions": regressions,
+        "improvements": improvements,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the expense tracker's hot paths and emit JSON")
+    parser.add_argument("--only", nargs="+", choices=SECTIONS, default=list(SECTIONS))
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="ledger sizes to measure at, e.g. 1000 10000 100000 1000000 10000000")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=30, help="timed requests per read endpoint and size")
+    parser.add_argument("--add-requests", type=int, default=200, help="POST /add_expense calls per size")
+    parser.add_argument("--statement-sizes", type=int, nargs="+", default=[100, 1000], help="transactions per synthetic statement")
+    parser.add_argument("--force-ocr", action="store_true", help="OCR every statement page instead of using the text layer")
+    parser.add_argument("--chain-lengths", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--transactions-per-block", type=int, default=20)
+    parser.add_argument("--build-difficulty", type=int, default=2)
+    parser.add_argument("--pow-blocks", type=int, default=5)
+    parser.add_argument("--output", help="write the report here instead of stdout")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    # The app logs to stderr already; this keeps anything a library prints
+    # (an OCR model download, say) out of the JSON report on stdout.
+    with contextlib.redirect_stdout(sys.stderr):
+        report = benchmark(
+            args.only, args.rows, args.seed, args.repeat, args.add_requests, args.statement_sizes, args.force_ocr,
+            args.chain_lengths, args.transactions_per_block, args.build_difficulty, args.pow_blocks
+        )
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            report["comparison"] = compare(json.load(baseline_file), report, args.threshold)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
@@ -0,0 +1,167 @@
+import argparse
+import json
+import random
+import sys
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List
+
+# Merchants per category. Descriptions are built from these so the rule engine
+# and the classifier see realistic, repetitive text rather than random noise.
+MERCHANTS = {
+    "Food": ["Zomato", "Swiggy", "Balaji Parlour", "MAHAVEER FALUDA ICECREAM", "Chauhan Soda Shop", "Haldiram Sweets"],
+    "Groceries": ["JAI MAHADEV PROVISIO", "Reliance Fresh", "DMart", "Fresh Vegetables Stall", "BigBasket"],
+    "Transport": ["Bhagwan Rokadiya Sarkar Fuel", "Indian Oil Fuel", "Uber India", "Ola Cabs", "Rapido"],
+    "Bills": ["Airtel Prepaid", "Jio Recharge", "BESCOM Electricity", "Tata Play", "ACT Fibernet"],
+    "Entertainment": ["PVR Cinemas", "BookMyShow Movie", "Netflix", "Spotify"],
+    "Shopping": ["Amazon Pay", "Flipkart", "Myntra", "Decathlon"],
+    "Personal": ["Mr ABHISHEK KUMAR", "Preeti Sharma", "Rohit Verma", "Aditya Bhai"],
+}
+# Rough share of transactions and (low, high) amount in rupees per category.
+CATEGORY_WEIGHTS = {"Food": 30, "Groceries": 20, "Transport": 18, "Bills": 8, "Entertainment": 7, "Shopping": 9, "Personal": 8}
+AMOUNT_RANGES = {"Food": (20, 600), "Groceries": (50, 2500), "Transport": (30, 1500), "Bills": (149, 3000),
+                 "Entertainment": (99, 1200), "Shopping": (199, 6000), "Personal": (10, 5000)}
+TRANSACTION_TYPES = ["UPI", "UPI", "UPI", "Card", "Cash"]
+LEDGER_START = date(2024, 1, 1)
+LEDGER_BLOCK = 1000
+
+# A4 in points, and the layout of the synthetic statement pages.
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+LINE_HEIGHT = 11
+TRANSACTIONS_PER_PAGE = 7
+
+
+def iter_ledger(rows: int, seed: int = 0, start: int = 0, days: int = 730) -> Iterator[Dict[str, Any]]:
+    """Yield ``rows`` expenses in the API's request shape, identical for a given seed.
+
+    Rows ``start`` onwards of the same sequence are produced by passing
+    ``start``, so a ledger can be grown in steps without regenerating its head.
+    Every block of LEDGER_BLOCK rows draws from its own seeded generator, and
+    dates fall anywhere in the ``days`` days from LEDGER_START whatever the
+    ledger size.
+    """
+    categories = list(CATEGORY_WEIGHTS)
+    weights = [CATEGORY_WEIGHTS[category] for category in categories]
+    rng = random.Random()
+    for index in range(start - start % LEDGER_BLOCK, start + rows):
+        if index % LEDGER_BLOCK == 0:
+            rng.seed(seed * 1_000_003 + index // LEDGER_BLOCK)
+        category = rng.choices(categories, weights)[0]
+        low, high = AMOUNT_RANGES[category]
+        day = LEDGER_START + timedelta(days=rng.randrange(days))
+        expense = {
+            "amount": f"{rng.uniform(low, high):.2f}",
+            "description": f"Paid to {rng.choice(MERCHANTS[category])}",
+            "category": category,
+            "transaction_type": rng.choice(TRANSACTION_TYPES),
+            "date": day.strftime("%Y-%m-%d"),
+            "created_at": datetime(day.year, day.month, day.day, rng.randrange(24), rng.randrange(60), rng.randrange(60)).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        if index >= start:
+            yield expense
+
+
+def statement_transactions(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    # Whole-rupee amounts and newest first, as PhonePe lists them.
+    rng = random.Random(seed)
+    categories = list(CATEGORY_WEIGHTS)
+    weights = [CATEGORY_WEIGHTS[category] for category in categories]
+    moment = datetime(2025, 4, 30, 21, 0)
+    transactions = []
+    for _ in range(count):
+        moment -= timedelta(minutes=rng.randrange(30, 24 * 60))
+        category = rng.choices(categories, weights)[0]
+        low, high = AMOUNT_RANGES[category]
+        transactions.append({
+            "moment": moment,
+            "amount": rng.randrange(low, high),
+            "payee": rng.choice(MERCHANTS[category]),
+            "transaction_id": f"T{moment:%y%m%d%H%M}{rng.randrange(10 ** 12):012d}",
+            "utr": f"{rng.randrange(10 ** 12):012d}",
+        })
+    return transactions
+
+
+def statement_lines(transactions: List[Dict[str, Any]]) -> List[List[str]]:
+    """Lay the transactions out in the order PhonePe's text layer uses, one list of lines per page."""
+    pages = []
+    for first in range(0, len(transactions), TRANSACTIONS_PER_PAGE):
+        lines = ["Transaction Statement for 9000000000", "Date", "Transaction Details", "Type", "Amount"]
+        for transaction in transactions[first:first + TRANSACTIONS_PER_PAGE]:
+            moment = transaction["moment"]
+            lines += [
+                moment.strftime("%b %d, %Y"),
+                moment.strftime("%I:%M %p"),
+                "DEBIT",
+                # The base-14 fonts have no rupee sign; the parsers accept bare digits.
+                str(transaction["amount"]),
+                f"Paid to {transaction['payee']}",
+                f"Transaction ID {transaction['transaction_id']}",
+                f"UTR No. {transaction['utr']}",
+                "Paid by",
+                "XXXXXX0000",
+            ]
+        lines.append(f"Page {len(pages) + 1} of {-(-len(transactions) // TRANSACTIONS_PER_PAGE)}")
+        pages.append(lines)
+    return pages
+
+
+def _pdf_text(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_statement_pdf(path: str, transactions: List[Dict[str, Any]]) -> int:
+    """Write a PhonePe-style statement with a real text layer; returns the page count."""
+    pages = statement_lines(transactions)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    page_ids = []
+    for lines in pages:
+        commands = []
+        y = PAGE_HEIGHT - 40
+        for line in lines:
+            commands.append(f"BT /F1 9 Tf 40 {y} Td ({_pdf_text(line)}) Tj ET")
+            y -= LINE_HEIGHT
+        stream = "\n".join(commands).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode())
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as pdf_file:
+        pdf_file.write(output)
+    return len(pages)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate deterministic synthetic ledgers and statements")
+    parser.add_argument("--seed", type=int, default=0)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ledger = subparsers.add_parser("ledger", help="write expenses as JSON lines to stdout")
+    ledger.add_argument("--rows", type=int, default=1000)
+    statement = subparsers.add_parser("statement", help="write a PhonePe-style PDF statement")
+    statement.add_argument("path")
+    statement.add_argument("--transactions", type=int, default=100)
+    args = parser.parse_args()
+    if args.command == "ledger":
+        for expense in iter_ledger(args.rows, args.seed):
+            sys.stdout.write(json.dumps(expense) + "\n")
+    else:
+        pages = write_statement_pdf(args.path, statement_transactions(args.transactions, args.seed))
+        print(json.dumps({"path": args.path, "transactions": args.transactions, "pages": pages}))
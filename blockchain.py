@@ -1,15 +1,44 @@
 import hashlib
+import hmac
 import json
+import threading
 import time
-from typing import Dict, List, Any
-from bson.objectid import ObjectId
+from typing import Dict, List, Any, Optional
+from chain_store import BlockConflict
+from merkle import leaf_hash, merkle_root, merkle_proof, verify_proof
+import observability
+
+log = observability.get_logger(__name__)
+
+HEADER_FIELDS = ('index', 'timestamp', 'proof', 'previous_hash', 'merkle_root')
+# Blocks sealed for one user also commit to that user's id; blocks from before
+# per-user partitioning have no owner and hash exactly as they always did.
+OWNER_FIELD = 'user_id'
+# Times a block is re-mined when another process appends first.
+APPEND_ATTEMPTS = 5
+# Transaction values hashed as they are; anything else (an ObjectId, bytes) is stringified.
+JSON_TYPES = (str, int, float, bool, list, dict, type(None))
 
 class Blockchain:
-    def __init__(self):
+    def __init__(self, store=None, window: int = 256, signing_key: Optional[bytes] = None, miner=None):
         self.chain: List[Dict[str, Any]] = []
         self.transactions: List[Dict[str, Any]] = []
-        self.create_genesis_block()
+        self.lock = threading.RLock()
+        self.store = store
+        self.window = window
+        # Without a key checkpoints are neither written nor trusted, so every
+        # validation walks the whole chain.
+        self.signing_key = signing_key
+        self.miner = miner
         self.difficulty = 4
+        self.last_validation: Dict[str, Any] = {}
+        if self.store is not None:
+            self.chain = self.store.latest_blocks(self.window)
+        if not self.chain:
+            try:
+                self.create_genesis_block()
+            except BlockConflict:
+                self.chain = self.store.latest_blocks(self.window)
 
     def create_genesis_block(self) -> None:
         genesis_block = {
@@ -17,19 +46,69 @@ class Blockchain:
             'timestamp': time.time(),
             'proof': 1,
             'previous_hash': '0',
+            'merkle_root': merkle_root([]),
             'transactions': []
         }
         genesis_block['hash'] = self.hash_block(genesis_block)
-        self.chain.append(genesis_block)
+        self.append_block(genesis_block)
+
+    def append_block(self, block: Dict[str, Any]) -> None:
+        if self.store is not None:
+            self.store.save_block(block)
+        self.chain.append(block)
+        # Only a recent window stays in memory; older blocks are paged in from the store.
+        if self.store is not None and len(self.chain) > self.window:
+            del self.chain[:-self.window]
+
+    def sync_tip(self) -> None:
+        # Other backend processes append to the same store; pick up their blocks
+        # before mining on top of what this process last saw.
+        if self.store is None:
+            return
+        latest = self.store.latest_blocks(1)
+        if latest and latest[0]['index'] != self.chain[-1]['index']:
+            self.chain = self.store.latest_blocks(self.window)
+
+    def get_block(self, index: int) -> Optional[Dict[str, Any]]:
+        if self.chain and index >= self.chain[0]['index']:
+            position = index - self.chain[0]['index']
+            return self.chain[position] if position < len(self.chain) else None
+        if self.store is not None:
+            return self.store.get_block(index)
+        return None
+
+    def find_block(self, block_hash: str) -> Optional[Dict[str, Any]]:
+        for block in reversed(self.chain):
+            if block['hash'] == block_hash:
+                return block
+        if self.store is not None:
+            return self.store.find_by_hash(block_hash)
+        return None
 
     def get_latest_block(self) -> Dict[str, Any]:
         return self.chain[-1]
 
+    def block_header(self, block: Dict[str, Any]) -> Dict[str, Any]:
+        header = {field: block[field] for field in HEADER_FIELDS}
+        if block.get(OWNER_FIELD) is not None:
+            header[OWNER_FIELD] = block[OWNER_FIELD]
+        return header
+
     def hash_block(self, block: Dict[str, Any]) -> str:
-        block_string = json.dumps(block, sort_keys=True).encode()
+        # Only the fixed-size header is hashed; transactions are committed via merkle_root.
+        block_string = json.dumps(self.block_header(block), sort_keys=True).encode()
         return hashlib.sha256(block_string).hexdigest()
 
+    def compute_merkle_root(self, transactions: List[Dict[str, Any]]) -> str:
+        return merkle_root([leaf_hash(transaction) for transaction in transactions])
+
     def proof_of_work(self, previous_proof: int) -> int:
+        with observability.stage("proof_of_work"):
+            return self._search_proof(previous_proof)
+
+    def _search_proof(self, previous_proof: int) -> int:
+        if self.miner is not None:
+            return self.miner.mine(previous_proof, self.difficulty)
         new_proof = 1
         check_proof = False
         while not check_proof:
@@ -40,42 +119,154 @@ class Blockchain:
                 new_proof += 1
         return new_proof
 
+    def is_block_valid(self, current_block: Dict[str, Any], previous_block: Dict[str, Any]) -> bool:
+        current_hash = self.hash_block(current_block)
+        if current_block['hash'] != current_hash:
+            return False
+        if current_block['previous_hash'] != previous_block['hash']:
+            return False
+        if current_block['merkle_root'] != self.compute_merkle_root(current_block['transactions']):
+            return False
+        previous_proof = previous_block['proof']
+        proof = current_block['proof']
+        hash_operation = hashlib.sha256(str(proof ** 2 - previous_proof ** 2).encode()).hexdigest()
+        if hash_operation[:self.difficulty] != "0" * self.difficulty:
+            return False
+        return True
+
+    def sign_checkpoint(self, index: int, block_hash: str) -> str:
+        if not self.signing_key:
+            raise ValueError("Checkpoints can't be signed without a signing key.")
+        return hmac.new(self.signing_key, f"{index}:{block_hash}".encode(), hashlib.sha256).hexdigest()
+
+    def trusted_checkpoint(self) -> Optional[Dict[str, Any]]:
+        if not self.signing_key:
+            return None
+        checkpoint = self.store.latest_checkpoint() if self.store is not None else None
+        if not checkpoint:
+            return None
+        expected = self.sign_checkpoint(checkpoint['index'], checkpoint['hash'])
+        if not hmac.compare_digest(expected, checkpoint.get('signature', '')):
+            log.warning("Ignoring checkpoint with bad signature", block=checkpoint['index'])
+            return None
+        return checkpoint
+
     def is_chain_valid(self) -> bool:
-        for i in range(1, len(self.chain)):
-            current_block = self.chain[i]
-            previous_block = self.chain[i - 1]
-            current_hash = self.hash_block(current_block)
-            if current_block['hash'] != current_hash:
-                return False
-            if current_block['previous_hash'] != previous_block['hash']:
-                return False
-            previous_proof = previous_block['proof']
-            proof = current_block['proof']
-            hash_operation = hashlib.sha256(str(proof ** 2 - previous_proof ** 2).encode()).hexdigest()
-            if hash_operation[:self.difficulty] != "0" * self.difficulty:
+        """Validate the chain without holding ``self.lock``, so sealing carries on meanwhile.
+
+        With a store, blocks are read from the store alone and the walk stops at
+        whatever tip exists when it reaches the end.
+        """
+        if self.store is None:
+            with self.lock:
+                chain = list(self.chain)
+            for i in range(1, len(chain)):
+                if not self.is_block_valid(chain[i], chain[i - 1]):
+                    return False
+            return True
+
+        # Everything up to the last signed checkpoint was verified before; only
+        # blocks appended since then are re-checked.
+        started = time.perf_counter()
+        checkpoint = self.trusted_checkpoint()
+        start_index = checkpoint['index'] if checkpoint else 1
+        previous_block = self.store.get_block(start_index)
+        if previous_block is None or (checkpoint and previous_block['hash'] != checkpoint['hash']):
+            self.last_validation = {"valid": False, "from_index": start_index, "blocks_checked": 0}
+            return False
+        if not checkpoint and previous_block['hash'] != self.hash_block(previous_block):
+            self.last_validation = {"valid": False, "from_index": start_index, "blocks_checked": 0}
+            return False
+        checked = 0
+        for current_block in self.store.iter_blocks(start_index + 1):
+            if current_block['index'] != previous_block['index'] + 1 or not self.is_block_valid(current_block, previous_block):
+                self.last_validation = {"valid": False, "from_index": start_index, "failed_at": current_block['index'], "blocks_checked": checked}
                 return False
+            previous_block = current_block
+            checked += 1
+        if checked and self.signing_key:
+            self.store.save_checkpoint({
+                'index': previous_block['index'],
+                'hash': previous_block['hash'],
+                'signature': self.sign_checkpoint(previous_block['index'], previous_block['hash']),
+                'created_at': time.time()
+            })
+        self.last_validation = {
+            "valid": True,
+            "from_index": start_index,
+            "tip_index": previous_block['index'],
+            "blocks_checked": checked,
+            "seconds": round(time.perf_counter() - started, 4)
+        }
         return True
 
-    def create_block(self, proof: int, previous_hash: str) -> Dict[str, Any]:
+    def create_block(self, proof: int, previous_hash: str, user_id: Optional[str] = None) -> Dict[str, Any]:
         block = {
-            'index': len(self.chain) + 1,
+            'index': self.get_latest_block()['index'] + 1,
             'timestamp': time.time(),
             'proof': proof,
             'previous_hash': previous_hash,
+            'merkle_root': self.compute_merkle_root(self.transactions),
             'transactions': self.transactions.copy()
         }
+        if user_id is not None:
+            block[OWNER_FIELD] = user_id
         block['hash'] = self.hash_block(block)
+        self.append_block(block)
         self.transactions = []
-        self.chain.append(block)
         return block
 
-    def add_transaction(self, transaction: Dict[str, Any]) -> str:
-        serializable_transaction = {
-            key: str(value) if isinstance(value, (bytes, ObjectId)) else value
+    def serialize_transaction(self, transaction: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            key: value if isinstance(value, JSON_TYPES) else str(value)
             for key, value in transaction.items()
         }
-        self.transactions.append(serializable_transaction)
-        previous_block = self.get_latest_block()
-        proof = self.proof_of_work(previous_block['proof'])
-        new_block = self.create_block(proof, previous_block['hash'])
-        return new_block['hash']
\ No newline at end of file
+
+    def add_transaction(self, transaction: Dict[str, Any]) -> str:
+        return self.add_transactions([transaction])
+
+    def add_transactions(self, transactions: List[Dict[str, Any]], user_id: Optional[str] = None) -> str:
+        with self.lock:
+            self.transactions.extend(self.serialize_transaction(transaction) for transaction in transactions)
+            try:
+                for attempt in range(1, APPEND_ATTEMPTS + 1):
+                    self.sync_tip()
+                    previous_block = self.get_latest_block()
+                    proof = self.proof_of_work(previous_block['proof'])
+                    try:
+                        new_block = self.create_block(proof, previous_block['hash'], user_id)
+                        break
+                    except BlockConflict:
+                        if attempt == APPEND_ATTEMPTS:
+                            raise
+                        log.info("Chain tip moved while mining, retrying", index=previous_block['index'] + 1, attempt=attempt)
+            except Exception:
+                self.transactions = []
+                raise
+            return new_block['hash']
+
+    def inclusion_proof(self, block: Dict[str, Any], expense_id: str) -> Optional[Dict[str, Any]]:
+        leaves = []
+        position = None
+        for i, transaction in enumerate(block['transactions']):
+            leaves.append(leaf_hash(transaction))
+            if position is None and transaction.get('expense_id') == expense_id:
+                position = i
+        if position is None:
+            return None
+        return {
+            'block_hash': block['hash'],
+            'header': self.block_header(block),
+            'transaction': block['transactions'][position],
+            'leaf_index': position,
+            'path': merkle_proof(leaves, position)
+        }
+
+    def verify_inclusion(self, transaction: Dict[str, Any], path: List[Dict[str, str]], header: Dict[str, Any],
+                         leaf_index: int, block_hash: Optional[str] = None) -> bool:
+        # A client-supplied header proves nothing by itself; it has to be the
+        # header of a block this chain actually holds.
+        block = self.find_block(block_hash) if block_hash is not None else self.get_block(header['index'])
+        if block is None or self.block_header(block) != header:
+            return False
+        return verify_proof(leaf_hash(transaction), leaf_index, len(block['transactions']), path, block['merkle_root'])
@@ -0,0 +1,181 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import observability
+
+DEFAULT_CATEGORY = "Others"
+# Spellings the fallback category has been stored under.
+CATEGORY_ALIASES = {"other": DEFAULT_CATEGORY}
+log = observability.get_logger(__name__)
+
+# Seed rules carried over from the keyword checks that used to live in
+# upload_statement and the frontend SMS parser. Lower priority wins.
+DEFAULT_RULES = [
+    {"pattern": "zomato", "category": "Food", "priority": 10},
+    {"pattern": "vegetables", "category": "Food", "priority": 10},
+    {"pattern": "preeti", "category": "Personal", "priority": 20},
+    {"pattern": "rohit", "category": "Personal", "priority": 20},
+    {"pattern": "yadav", "category": "Family", "priority": 30},
+    {"pattern": "food", "category": "Food", "priority": 40},
+    {"pattern": "lunch", "category": "Food", "priority": 40},
+    {"pattern": "transport", "category": "Transport", "priority": 50},
+    {"pattern": "fuel", "category": "Transport", "priority": 50},
+    {"pattern": "entertainment", "category": "Entertainment", "priority": 60},
+    {"pattern": "movie", "category": "Entertainment", "priority": 60},
+]
+
+
+class Automaton:
+    """Aho-Corasick automaton over lower-cased rule patterns.
+
+    Every node stores the best rule (lowest priority, then earliest rule)
+    ending there or on its failure chain, so a single pass over the text
+    finds the winning rule without backtracking.
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.rules = rules
+        # Lower-cased category name -> the spelling the rules use.
+        self.categories = {DEFAULT_CATEGORY.lower(): DEFAULT_CATEGORY, **CATEGORY_ALIASES}
+        for rule in rules:
+            self.categories.setdefault(rule["category"].lower(), rule["category"])
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.best: List[Optional[int]] = [None]
+        for rule_index, rule in enumerate(rules):
+            self._insert(rule["pattern"].lower(), rule_index)
+        self._link()
+
+    def _rank(self, rule_index: Optional[int]):
+        if rule_index is None:
+            return (float("inf"), float("inf"))
+        return (self.rules[rule_index].get("priority", 100), rule_index)
+
+    def _better(self, first: Optional[int], second: Optional[int]) -> Optional[int]:
+        return first if self._rank(first) <= self._rank(second) else second
+
+    def _insert(self, pattern: str, rule_index: int) -> None:
+        if not pattern:
+            return
+        node = 0
+        for char in pattern:
+            next_node = self.goto[node].get(char)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.best.append(None)
+                self.goto[node][char] = next_node
+            node = next_node
+        self.best[node] = self._better(self.best[node], rule_index)
+
+    def _link(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.best[child] = self._better(self.best[child], self.best[self.fail[child]])
+                queue.append(child)
+
+    def match(self, text: str) -> Optional[Dict[str, Any]]:
+        node = 0
+        best = None
+        goto = self.goto
+        fail = self.fail
+        for char in text.lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if self.best[node] is not None:
+                best = self._better(best, self.best[node])
+        return self.rules[best] if best is not None else None
+
+
+class CategoryEngine:
+    def __init__(self, storage, refresh_interval: float = 5.0):
+        self.storage = storage
+        self.refresh_interval = refresh_interval
+        self._automaton: Optional[Automaton] = None
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+
+    def _rules_version(self) -> int:
+        doc = self.storage.get_meta("category_rules_version")
+        return doc["value"] if doc else 0
+
+    def _bump_version(self) -> None:
+        self.storage.increment_meta("category_rules_version")
+        self._checked_at = 0.0
+
+    def seed_defaults(self) -> None:
+        if not self.storage.has_rules():
+            self.storage.insert_rules(DEFAULT_RULES)
+            self._bump_version()
+
+    def add_rules(self, rules: List[Dict[str, Any]]) -> int:
+        documents = [
+            {"pattern": rule["pattern"].strip().lower(), "category": self.canonical(rule["category"]), "priority": int(rule.get("priority", 100))}
+            for rule in rules
+        ]
+        if documents:
+            self.storage.insert_rules(documents)
+            self._bump_version()
+        return len(documents)
+
+    def list_rules(self) -> List[Dict[str, Any]]:
+        return self.storage.list_rules()
+
+    def automaton(self) -> Automaton:
+        # The version is re-read at most every refresh_interval seconds and the
+        # automaton is only rebuilt when it has actually moved.
+        now = time.monotonic()
+        if self._automaton is not None and now - self._checked_at < self.refresh_interval:
+            return self._automaton
+        with self._lock:
+            if self._automaton is not None and now - self._checked_at < self.refresh_interval:
+                return self._automaton
+            version = self._rules_version()
+            if self._automaton is None or version != self._version:
+                rules = self.storage.list_rules()
+                self._automaton = Automaton(rules)
+                self._version = version
+                self.rebuilds += 1
+                log.info("Compiled category rules", rules=len(rules), version=version)
+            self._checked_at = now
+            return self._automaton
+
+    def canonical(self, category: str) -> str:
+        """Spell a category the way the rules do when it differs only in case ("food" -> "Food")."""
+        category = category.strip()
+        return self.automaton().categories.get(category.lower(), category)
+
+    def normalize_stored(self) -> Dict[str, str]:
+        """Rename stored expense categories to their canonical spelling; returns the renames made."""
+        renames = {}
+        for category in self.storage.expense_categories({}):
+            if category and self.canonical(category) != category:
+                renames[category] = self.canonical(category)
+        if renames:
+            self.storage.rename_categories(renames)
+            log.info("Normalised stored categories", renames=renames)
+        return renames
+
+    def categorize(self, text: str, default: str = DEFAULT_CATEGORY) -> str:
+        rule = self.automaton().match(text or "")
+        return rule["category"] if rule else default
+
+    def categorize_many(self, texts: List[str], default: str = DEFAULT_CATEGORY) -> List[str]:
+        automaton = self.automaton()
+        categories = []
+        for text in texts:
+            rule = automaton.match(text or "")
+            categories.append(rule["category"] if rule else default)
+        return categories
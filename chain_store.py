@@ -0,0 +1,68 @@
+from typing import Any, Dict, Iterator, List, Optional
+
+# Blocks are stored flat (header fields, transactions and hash at the top
+# level). Older documents without a merkle_root belong to chains that were
+# rebuilt from a fresh genesis on every restart and are not part of this chain.
+CHAIN_FILTER = {"merkle_root": {"$exists": True}, "index": {"$exists": True}}
+
+
+class BlockConflict(Exception):
+    """Another writer has already stored a block at this index."""
+
+
+class ChainStore:
+    # pymongo is imported where it is used, so the SQLite backend, which shares
+    # BlockConflict, runs without it installed.
+
+    def __init__(self, blocks_collection, checkpoints_collection):
+        self.blocks = blocks_collection
+        self.checkpoints = checkpoints_collection
+
+    def ensure_indexes(self) -> None:
+        from pymongo import ASCENDING, DESCENDING
+
+        self.blocks.create_index([("index", ASCENDING)], unique=True, partialFilterExpression=CHAIN_FILTER)
+        self.blocks.create_index([("hash", ASCENDING)])
+        self.blocks.create_index([("user_id", ASCENDING), ("index", DESCENDING)])
+        self.checkpoints.create_index([("index", DESCENDING)])
+
+    def save_block(self, block: Dict[str, Any]) -> None:
+        from pymongo.errors import DuplicateKeyError
+
+        try:
+            self.blocks.insert_one(dict(block))
+        except DuplicateKeyError as e:
+            raise BlockConflict(f"Block {block['index']} already exists") from e
+
+    def latest_blocks(self, limit: int) -> List[Dict[str, Any]]:
+        from pymongo import DESCENDING
+
+        cursor = self.blocks.find(CHAIN_FILTER, {"_id": 0}).sort("index", DESCENDING).limit(limit)
+        return list(reversed(list(cursor)))
+
+    def get_block(self, index: int) -> Optional[Dict[str, Any]]:
+        return self.blocks.find_one({**CHAIN_FILTER, "index": index}, {"_id": 0})
+
+    def find_by_hash(self, block_hash: str) -> Optional[Dict[str, Any]]:
+        return self.blocks.find_one({**CHAIN_FILTER, "hash": block_hash}, {"_id": 0})
+
+    def iter_blocks(self, start_index: int, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        from pymongo import ASCENDING
+
+        query = {**CHAIN_FILTER, "index": {"$gte": start_index}}
+        return self.blocks.find(query, {"_id": 0}).sort("index", ASCENDING).batch_size(batch_size)
+
+    def all_blocks(self, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        # Includes documents left by the pre-merkle chains, for the debug view.
+        from pymongo import DESCENDING
+
+        query = {} if user_id is None else {"user_id": user_id}
+        return list(self.blocks.find(query, {"_id": 0}).sort("index", DESCENDING))
+
+    def save_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        self.checkpoints.insert_one(dict(checkpoint))
+
+    def latest_checkpoint(self) -> Optional[Dict[str, Any]]:
+        from pymongo import DESCENDING
+
+        return self.checkpoints.find_one({}, {"_id": 0}, sort=[("index", DESCENDING)])
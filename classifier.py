@@ -0,0 +1,214 @@
+import copy
+import os
+import pickle
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+import observability
+
+# Categories that carry no signal and must never be learned as labels.
+UNLABELLED_CATEGORIES = ("other", "Others", "unknown", "", None)
+# Only categories chosen by a user or a rule are trusted for training; the
+# model's own guesses and the fallback default would feed back into it.
+UNTRUSTED_SOURCES = ("model", "default")
+log = observability.get_logger(__name__)
+
+
+def _vectorizer() -> HashingVectorizer:
+    # Stateless, so one instance per process serves every model version.
+    return HashingVectorizer(
+        analyzer="char_wb",
+        ngram_range=(2, 4),
+        n_features=2 ** 16,
+        alternate_sign=False,
+        lowercase=True
+    )
+
+
+class CategoryClassifier:
+    """Fallback category predictor for descriptions no rule matches.
+
+    Each user gets their own model, fitted only on their own expenses, so one
+    user's descriptions and categories never show up in another's suggestions.
+    A model is an SGD logistic regression over hashed character n-grams, so
+    it can be updated with ``partial_fit`` on only the expenses added since
+    the last run. Retraining works on copies and publishes them with a single
+    reference swap; readers never see a half-trained model.
+
+    The models are saved with pickle, and unpickling runs code: ``model_path``
+    must be a file only this service can write. It is resolved once at start,
+    written owner-only, and not loaded if others can write to it.
+    """
+
+    def __init__(self, storage, model_path: str = "category_model.pkl",
+                 min_confidence: float = 0.5, retrain_interval: float = 600.0, batch_size: int = 1000):
+        self.storage = storage
+        self.model_path = os.path.abspath(model_path)
+        self.min_confidence = min_confidence
+        self.retrain_interval = retrain_interval
+        self.batch_size = batch_size
+        self.vectorizer = _vectorizer()
+        # user_id -> that user's model state.
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._train_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._predictions = 0
+        self._confident = 0
+        self._last_error: Optional[str] = None
+
+    def _trusted(self) -> bool:
+        if os.name != "posix":
+            return True
+        info = os.stat(self.model_path)
+        return info.st_uid == os.getuid() and not info.st_mode & 0o022
+
+    def load(self) -> bool:
+        if not os.path.exists(self.model_path):
+            return False
+        if not self._trusted():
+            log.error("Refusing to load a category model others can write", path=self.model_path)
+            return False
+        try:
+            with open(self.model_path, "rb") as model_file:
+                saved = pickle.load(model_file)
+        except Exception as e:
+            log.error("Failed to load category model", path=self.model_path, error=str(e))
+            return False
+        if "users" not in saved:
+            # A single model fitted on everyone's expenses; refit per user instead.
+            log.warning("Discarding shared category model", path=self.model_path)
+            return False
+        self._states = saved["users"]
+        log.info("Loaded category models", users=len(self._states))
+        return True
+
+    def _save(self, states: Dict[str, Dict[str, Any]]) -> None:
+        temp_path = f"{self.model_path}.tmp"
+        with open(os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as model_file:
+            pickle.dump({"users": states}, model_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.model_path)
+
+    def _labelled_filter(self, user_id: Optional[str] = None) -> Dict[str, Any]:
+        spec = {
+            "exclude_categories": UNLABELLED_CATEGORIES,
+            "exclude_sources": UNTRUSTED_SOURCES,
+            "description_required": True
+        }
+        if user_id is not None:
+            spec["user_id"] = user_id
+        return spec
+
+    def train(self, full: bool = False, user_id: Optional[str] = None) -> int:
+        """Fit ``user_id``'s model, or every user's; returns the expenses trained on."""
+        with self._train_lock:
+            users = [user_id] if user_id is not None else self.storage.expense_users(self._labelled_filter())
+            states = dict(self._states)
+            samples = 0
+            for user in users:
+                samples += self._train_user(user, states, full)
+            if samples:
+                self._save(states)
+                self._states = states
+            return samples
+
+    def _train_user(self, user_id: str, states: Dict[str, Dict[str, Any]], full: bool) -> int:
+        state = states.get(user_id)
+        query = self._labelled_filter(user_id)
+        classes = self.storage.expense_categories(query)
+        if len(classes) < 2:
+            return 0
+        # partial_fit can't grow its class list, so a new category means
+        # starting over from the whole labelled history.
+        incremental = not full and state is not None and state["classes"] == classes
+        if incremental:
+            query["after_id"] = state["trained_through"]
+            model = copy.deepcopy(state["model"])
+        else:
+            model = SGDClassifier(loss="log_loss", alpha=1e-5, random_state=0)
+
+        started = time.perf_counter()
+        samples = 0
+        trained_through = state["trained_through"] if incremental else None
+        cursor = self.storage.find_expenses(query, ("description", "category"), sort="id", batch_size=self.batch_size)
+        batch = []
+        for expense in cursor:
+            batch.append(expense)
+            if len(batch) >= self.batch_size:
+                model.partial_fit(self.vectorizer.transform([e["description"] for e in batch]), [e["category"] for e in batch], classes=classes)
+                samples += len(batch)
+                trained_through = batch[-1]["_id"]
+                batch = []
+        if batch:
+            model.partial_fit(self.vectorizer.transform([e["description"] for e in batch]), [e["category"] for e in batch], classes=classes)
+            samples += len(batch)
+            trained_through = batch[-1]["_id"]
+        if not samples:
+            return 0
+
+        new_state = {
+            "model": model,
+            "classes": classes,
+            "trained_through": trained_through,
+            "version": (state["version"] if state else 0) + 1,
+            "samples": (state["samples"] if incremental else 0) + samples,
+            "trained_at": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        states[user_id] = new_state
+        log.info("Category model trained", user_id=user_id, version=new_state['version'], fit='incremental' if incremental else 'full',
+                 samples=samples, seconds=round(time.perf_counter() - started, 2))
+        return samples
+
+    def predict_many(self, texts: List[str], user_id: str) -> List[Optional[str]]:
+        state = self._states.get(user_id)
+        if state is None or not texts:
+            return [None] * len(texts)
+        probabilities = state["model"].predict_proba(self.vectorizer.transform([text or "" for text in texts]))
+        best = probabilities.argmax(axis=1)
+        model_classes = state["model"].classes_
+        predictions = []
+        for row, index in enumerate(best):
+            predictions.append(str(model_classes[index]) if probabilities[row, index] >= self.min_confidence else None)
+        confident = sum(1 for prediction in predictions if prediction is not None)
+        self._predictions += len(predictions)
+        self._confident += confident
+        return predictions
+
+    def _run(self) -> None:
+        # Without saved models, fit them straight away rather than a full interval later.
+        delay = 0 if not self._states else self.retrain_interval
+        while not self._stopped.wait(delay):
+            delay = self.retrain_interval
+            try:
+                self.train()
+                self._last_error = None
+            except Exception as e:
+                self._last_error = str(e)
+                log.error("Category model retraining failed", error=str(e))
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="category-trainer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def stats(self) -> Dict[str, Any]:
+        states = self._states
+        # Counts only: the class lists are users' own category names.
+        return {
+            "loaded": bool(states),
+            "users": len(states),
+            "samples": sum(state["samples"] for state in states.values()),
+            "trained_at": max((state["trained_at"] for state in states.values()), default=None),
+            "predictions": self._predictions,
+            "confident_predictions": self._confident,
+            "min_confidence": self.min_confidence,
+            "retrain_interval": self.retrain_interval,
+            "last_error": self._last_error
+        }
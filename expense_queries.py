@@ -0,0 +1,107 @@
+import base64
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from records import date_key, serialize_expense, to_date, to_paise
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+EXPENSE_FIELDS = ("amount", "description", "category", "transaction_type", "date", "created_at", "block_hash")
+
+
+class QueryError(ValueError):
+    pass
+
+
+def encode_cursor(expense: Dict[str, Any]) -> str:
+    payload = json.dumps({"date": date_key(expense.get("date")), "id": str(expense["_id"])}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, parse_id: Callable[[str], Any]) -> Tuple[Any, Any]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return to_date(payload["date"]), parse_id(payload["id"])
+    except Exception:
+        raise QueryError("Invalid cursor.")
+
+
+def _paise(args, name: str) -> Optional[int]:
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return to_paise(value)
+    except ValueError:
+        raise QueryError(f"Invalid {name}.")
+
+
+def _date(args, name: str) -> Optional[Any]:
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return to_date(value)
+    except ValueError:
+        raise QueryError(f"Invalid {name}.")
+
+
+def build_filter(args) -> Dict[str, Any]:
+    # A backend-neutral filter; see storage.py for how each backend applies it.
+    spec = {
+        "start_date": _date(args, 'start_date'),
+        "end_date": _date(args, 'end_date'),
+        "category": args.get('category') or None,
+        "transaction_type": args.get('transaction_type') or None,
+        "min_paise": _paise(args, 'min_amount'),
+        "max_paise": _paise(args, 'max_amount'),
+    }
+    return {key: value for key, value in spec.items() if value is not None}
+
+
+def user_filter(args, user_id: str) -> Dict[str, Any]:
+    return {"user_id": user_id, **build_filter(args)}
+
+
+def build_projection(args) -> Tuple[str, ...]:
+    fields = [field.strip() for field in (args.get('fields') or '').split(',') if field.strip()]
+    unknown = [field for field in fields if field not in EXPENSE_FIELDS]
+    if unknown:
+        raise QueryError(f"Unknown fields: {', '.join(unknown)}.")
+    fields = tuple(fields or EXPENSE_FIELDS)
+    if "amount" in fields:
+        fields = tuple(field for field in fields if field != "amount") + ("amount_paise",)
+    # date and _id are always returned because the cursor is built from them.
+    return fields + ("date",)
+
+
+def page_size(args) -> int:
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise QueryError("Invalid limit.")
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def fetch_page(storage, args, user_id: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    spec = user_filter(args, user_id)
+    after = decode_cursor(args['cursor'], storage.parse_id) if args.get('cursor') else None
+    limit = page_size(args)
+    # One extra row tells us whether another page exists without a count query.
+    documents = list(storage.find_expenses(spec, build_projection(args), after=after, limit=limit + 1))
+    next_cursor = encode_cursor(documents[limit - 1]) if len(documents) > limit else None
+    expenses = []
+    for document in documents[:limit]:
+        expense = serialize_expense(document)
+        expense["id"] = str(expense.pop("_id"))
+        expenses.append(expense)
+    return expenses, next_cursor
+
+
+def daily_totals(storage, args, user_id: str) -> Dict[str, float]:
+    return {day: total / 100 for day, total in storage.daily_totals(user_filter(args, user_id)).items()}
+
+
+def category_totals(storage, args, user_id: str) -> Dict[str, float]:
+    return {category: total / 100 for category, total in storage.category_totals(user_filter(args, user_id)).items()}
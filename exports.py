@@ -0,0 +1,108 @@
+import csv
+import io
+from typing import Any, Dict, Iterable, Iterator, List
+
+import pandas as pd
+
+from rollups import amount_of
+
+EXPORT_COLUMNS = [
+    ("date", "Date"),
+    ("description", "Description"),
+    ("amount", "Amount"),
+    ("category", "Category"),
+    ("transaction_type", "Transaction Type"),
+    ("created_at", "Created At"),
+    ("block_hash", "Block Hash"),
+]
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+CHUNK_ROWS = 1000
+
+
+def _chunks(documents: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for document in documents:
+        chunk.append(document)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_csv(documents: Iterable[Dict[str, Any]], chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([title for _, title in EXPORT_COLUMNS])
+    for chunk in _chunks(documents, chunk_rows):
+        for expense in chunk:
+            writer.writerow([expense.get(field, "N/A" if field == "block_hash" else "") for field, _ in EXPORT_COLUMNS])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _DrainingSink(io.RawIOBase):
+    # Write-only file object that hands back what was written since the last
+    # drain while still reporting absolute positions (Parquet footers need them).
+    def __init__(self):
+        super().__init__()
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _frame(chunk: List[Dict[str, Any]]) -> pd.DataFrame:
+    frame = pd.DataFrame.from_records(
+        [{field: expense.get(field) for field, _ in EXPORT_COLUMNS} for expense in chunk],
+        columns=[field for field, _ in EXPORT_COLUMNS]
+    )
+    frame["amount"] = [amount_of(expense) for expense in chunk]
+    for field, _ in EXPORT_COLUMNS:
+        if field != "amount":
+            frame[field] = frame[field].astype("string")
+    return frame
+
+
+def iter_columnar(documents: Iterable[Dict[str, Any]], export_format: str, chunk_rows: int = CHUNK_ROWS * 10) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(field, pa.float64() if field == "amount" else pa.string()) for field, _ in EXPORT_COLUMNS])
+    sink = _DrainingSink()
+    if export_format == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    try:
+        for chunk in _chunks(documents, chunk_rows):
+            table = pa.Table.from_pandas(_frame(chunk), schema=schema, preserve_index=False)
+            writer.write_table(table)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
@@ -0,0 +1,47 @@
+import hashlib
+import re
+from collections import Counter
+from typing import Any, Dict
+
+from records import date_key, paise_of
+
+NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def file_fingerprint(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def normalize_description(description: str) -> str:
+    # OCR and text-layer extraction disagree on case, spacing and stray
+    # punctuation; none of that should make two copies of a row look different.
+    return NON_WORD.sub(" ", str(description).lower()).strip()
+
+
+class TransactionFingerprinter:
+    """Assigns content fingerprints to the rows of one import.
+
+    The same payment can legitimately appear twice on one day, so identical
+    rows are told apart by how many times the tuple has already been seen in
+    this import. An overlapping statement lists the same rows in the same
+    multiplicity and so reproduces the same fingerprints.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self._seen = Counter()
+
+    def fingerprint(self, expense: Dict[str, Any]) -> str:
+        key = "|".join((
+            date_key(expense.get("date")),
+            f"{paise_of(expense) / 100:.2f}",
+            normalize_description(expense.get("description", "")),
+            self.source
+        ))
+        occurrence = self._seen[key]
+        self._seen[key] += 1
+        return hashlib.sha256(f"{key}|{occurrence}".encode()).hexdigest()
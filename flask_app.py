@@ -1,18 +1,24 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+from flask import Flask, render_template, render_template_string, request, redirect, url_for, flash, session, Response, stream_with_context
 from flask_babel import Babel, _
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import threading
 import socket
 from datetime import datetime, timedelta
 import random
 import re
 import sys
-import traceback
 import os
+import io
+import sms_templates
+import identity
+import observability
 
-# Enable debug output to console
-print("Starting flask_app.py...")
-
+log = observability.get_logger('frontend')
 app = Flask(__name__)
+observability.instrument(app, 'frontend')
 app.secret_key = os.urandom(24)  # Secure random key
 
 app.config['BABEL_DEFAULT_LOCALE'] = 'en'
@@ -24,8 +30,6 @@ def get_locale():
 babel.init_app(app, locale_selector=get_locale)
 app.jinja_env.globals['get_locale'] = get_locale
 
-print("Flask and Babel initialized.")
-
 @app.route('/set_language/<lang>')
 def set_language(lang):
     session['lang'] = lang
@@ -41,26 +45,121 @@ users = {
     }
 }
 
-def generate_ai_tip():
-    try:
-        response = requests.get('http://127.0.0.1:8001/expenses')
-        response.raise_for_status()
-        expenses = response.json().get('expenses', [])
-        if not expenses:
-            return _("No expenses recorded yet.")
-        category_totals = {}
-        for expense in expenses:
-            category = expense['category']
-            amount = float(str(expense['amount']).replace(',', '')) if isinstance(expense['amount'], str) else float(expense['amount'])
-            category_totals[category] = category_totals.get(category, 0) + amount
-        if category_totals:
-            highest_category = max(category_totals, key=category_totals.get)
-            highest_amount = category_totals[highest_category]
-            if highest_amount > 500:
-                return _(f"You've spent ₹{highest_amount:.2f} on {highest_category}. Consider reducing spending!")
-            return _(f"Your highest spending category is {highest_category} at ₹{highest_amount:.2f}. Monitor it!")
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching expenses for AI tip: {e}")
+HISTORY_FILTERS = ('cursor', 'limit', 'start_date', 'end_date', 'category', 'transaction_type', 'min_amount', 'max_amount')
+
+BACKEND_URL = 'http://127.0.0.1:8001'
+BACKEND_TIMEOUT = (3.05, 30)
+# The backend scopes every read and write to the logged-in user, which it only
+# accepts signed with the secret it shares with this frontend.
+USER_AUTH_SECRET = identity.load_secret(os.environ.get('USER_AUTH_SECRET'))
+if USER_AUTH_SECRET is None:
+    log.error("USER_AUTH_SECRET is not set; the backend will refuse every request")
+UPLOAD_TIMEOUT = (3.05, 600)
+SMS_BATCH_SIZE = int(os.environ.get('SMS_BATCH_SIZE', '500'))
+IMPORT_POLL_SECONDS = int(os.environ.get('IMPORT_POLL_SECONDS', '2'))
+ACTIVE_JOB_STATES = ('queued', 'running')
+
+# Self-contained so the progress page renders without a template file; it
+# reloads itself every IMPORT_POLL_SECONDS until the job stops running.
+IMPORT_PROGRESS_TEMPLATE = """<!doctype html>
+<html lang="{{ get_locale() }}">
+<head>
+<meta charset="utf-8">
+<title>{{ _('Statement import') }}</title>
+{% if job and job.status in active_states %}<meta http-equiv="refresh" content="{{ poll_seconds }}">{% endif %}
+</head>
+<body>
+<h1>{{ _('Statement import') }}</h1>
+{% if job %}
+<p>{{ job.filename }}: <strong>{{ job.status }}</strong></p>
+<progress max="{{ job.pages_total or 1 }}" value="{{ job.pages_done or 0 }}"></progress>
+<p>{{ _('Pages') }}: {{ job.pages_done or 0 }} / {{ job.pages_total if job.pages_total is not none else '?' }}</p>
+<p>{{ _('Transactions') }}: {{ job.transactions }} &middot; {{ _('Duplicates') }}: {{ job.duplicates }}</p>
+{% if job.errors %}
+<ul>{% for error in job.errors %}<li>{{ error }}</li>{% endfor %}</ul>
+{% endif %}
+{% if job.status in active_states %}
+<p>{{ _('This page refreshes every %(seconds)s seconds.', seconds=poll_seconds) }}</p>
+{% else %}
+<p><a href="{{ url_for('history') }}">{{ _('View history') }}</a> &middot; <a href="{{ url_for('upload') }}">{{ _('Upload another statement') }}</a></p>
+{% endif %}
+{% else %}
+<p>{{ detail }}</p>
+<p><a href="{{ url_for('upload') }}">{{ _('Back to upload') }}</a></p>
+{% endif %}
+</body>
+</html>
+"""
+
+# One keep-alive session shared by every request handler, so backend calls
+# reuse pooled TCP connections instead of opening a new one each time.
+backend = requests.Session()
+backend.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=32))
+fetch_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='backend-fetch')
+
+class ResponseCache:
+    """LRU cache of backend JSON payloads keyed by endpoint and query, bounded by total body size."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def record(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, key, etag, payload, size):
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[2]
+            if size > self.max_bytes:
+                return
+            self.entries[key] = (etag, payload, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _key, (_etag, _payload, evicted_size) = self.entries.popitem(last=False)
+                self.size -= evicted_size
+
+response_cache = ResponseCache(int(os.environ.get('BACKEND_CACHE_BYTES', str(8 * 1024 * 1024))))
+
+def backend_headers():
+    return identity.sign(USER_AUTH_SECRET, session['user_id'])
+
+def backend_get_json(path, user_id, params=None, **kwargs):
+    # user_id is passed in rather than read from the session so fetch_pool threads can call this.
+    kwargs.setdefault('timeout', BACKEND_TIMEOUT)
+    key = (user_id, path, tuple(sorted((params or {}).items())))
+    cached = response_cache.get(key)
+    headers = identity.sign(USER_AUTH_SECRET, user_id)
+    if cached:
+        headers['If-None-Match'] = cached[0]
+    with observability.stage("backend_call"):
+        response = backend.get(f'{BACKEND_URL}{path}', params=params, headers=headers, **kwargs)
+    if response.status_code == 304 and cached:
+        response_cache.record(True)
+        return cached[1]
+    response.raise_for_status()
+    response_cache.record(False)
+    payload = response.json()
+    if response.headers.get('ETag'):
+        response_cache.put(key, response.headers['ETag'], payload, len(response.content))
+    return payload
+
+def fallback_tip():
     tips = [
         _("Consider reducing dining out to save more this month!"),
         _("Your transport expenses are high. Try carpooling!"),
@@ -100,56 +199,19 @@ def home_endpoint():
     if 'user_id' not in session:
         return redirect(url_for('login'))
     try:
-        response = requests.get('http://127.0.0.1:8001/expenses')
-        response.raise_for_status()
-        expenses = response.json().get('expenses', [])
-        budget_response = requests.get('http://127.0.0.1:8001/budget')
-        budget_response.raise_for_status()
-        budget = budget_response.json().get('budget', 0)
-        
-        # Calculate total_spent with proper type handling
-        total_spent = sum(
-            float(str(expense['amount']).replace(',', '')) 
-            for expense in expenses 
-            if str(expense.get('amount', '0')).replace('.', '').replace(',', '').isdigit()
-        )
-        
-        category_totals = {}
-        for expense in expenses:
-            category = expense.get('category', 'other')
-            amount = float(str(expense['amount']).replace(',', '')) if isinstance(expense['amount'], str) else float(expense['amount'])
-            category_totals[category] = category_totals.get(category, 0) + amount
-        
-        print("Category Totals:", category_totals)  # Debug output
-        
-        history_response = requests.get('http://127.0.0.1:8001/history')
-        history_response.raise_for_status()
-        history_data = history_response.json()
-        history = history_data.get('history', [])
-        daily_totals = history_data.get('daily_totals', {})
-        
-        streak = 0
-        today = datetime.now().date()
-        threshold = 100
-        current_date = today
-        while True:
-            date_str = current_date.strftime('%Y-%m-%d')
-            daily_total = daily_totals.get(date_str, 0)
-            if daily_total <= threshold:
-                streak += 1
-            else:
-                break
-            current_date -= timedelta(days=1)
-        
-        ai_tip = generate_ai_tip()
-        return render_template('home.html', total_spent=total_spent, budget=budget,
-                              category_totals=category_totals, streak=streak,
-                              history=history, daily_totals=daily_totals, ai_tip=ai_tip)
+        dashboard_future = fetch_pool.submit(backend_get_json, '/dashboard', session['user_id'])
+        history_future = fetch_pool.submit(backend_get_json, '/history', session['user_id'], params={'limit': 20})
+        dashboard = dashboard_future.result()
+        history = history_future.result().get('history', [])
+        return render_template('home.html', total_spent=dashboard.get('total_spent', 0), budget=dashboard.get('budget', 0),
+                              category_totals=dashboard.get('category_totals', {}), streak=dashboard.get('streak', 0),
+                              history=history, daily_totals=dashboard.get('daily_totals', {}),
+                              ai_tip=dashboard.get('ai_tip') or fallback_tip())
     except requests.exceptions.RequestException as e:
         flash(_('Error fetching data. Please try again later.'), 'danger')
-        print(f"Error in home_endpoint: {e}")
+        log.error("Error fetching dashboard", error=str(e))
         return render_template('home.html', total_spent=0, budget=0,
-                              category_totals={}, streak=0, history=[], daily_totals={}, ai_tip="")
+                              category_totals={}, streak=0, history=[], daily_totals={}, ai_tip=fallback_tip())
 
 @app.route('/add', methods=['GET', 'POST'])
 def add_expense():
@@ -164,12 +226,12 @@ def add_expense():
             "date": request.form['date'] if request.form['date'] else datetime.now().strftime("%Y-%m-%d")
         }
         try:
-            response = requests.post('http://127.0.0.1:8001/add_expense', json=expense)
+            response = backend.post(f'{BACKEND_URL}/add_expense', json=expense, headers=backend_headers(), timeout=BACKEND_TIMEOUT)
             response.raise_for_status()
             flash(_('Expense added successfully!'), 'success')
         except requests.exceptions.RequestException as e:
             flash(_('Error adding expense: ') + str(e), 'danger')
-            print(f"Error adding expense: {e}")
+            log.error("Error adding expense", error=str(e))
         return redirect(url_for('home_endpoint'))
     return render_template('add_expense.html')
 
@@ -177,38 +239,52 @@ def add_expense():
 def history():
     if 'user_id' not in session:
         return redirect(url_for('login'))
+    filters = {key: request.args[key] for key in HISTORY_FILTERS if request.args.get(key)}
     try:
-        response = requests.get('http://127.0.0.1:8001/history')
-        response.raise_for_status()
-        history_data = response.json()
-        print("History Data:", history_data)
+        history_data = backend_get_json('/history', session['user_id'], params=filters)
         history = history_data.get('history', [])
         daily_totals = history_data.get('daily_totals', {})
+        next_cursor = history_data.get('next_cursor')
     except requests.exceptions.RequestException as e:
         flash(_('Error fetching history data. Please try again later.'), 'danger')
-        print(f"Error fetching history: {e}")
-        return render_template('history.html', history=[], daily_totals={})
-    return render_template('history.html', history=history, daily_totals=daily_totals)
+        log.error("Error fetching history", error=str(e))
+        return render_template('history.html', history=[], daily_totals={}, next_cursor=None, filters=filters)
+    return render_template('history.html', history=history, daily_totals=daily_totals, next_cursor=next_cursor, filters=filters)
 
 @app.route('/history/download')
 def download_history():
     if 'user_id' not in session:
         return redirect(url_for('login'))
-    response = requests.get('http://127.0.0.1:8001/history/download')
-    response.raise_for_status()
-    return response.content, 200, {'Content-Type': 'text/csv', 'Content-Disposition': 'attachment; filename=expense_history.csv'}
+    try:
+        response = backend.get(f'{BACKEND_URL}/history/download', params=request.args, headers=backend_headers(), stream=True, timeout=BACKEND_TIMEOUT)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        flash(_('Error downloading history: ') + str(e), 'danger')
+        log.error("Error downloading history", error=str(e))
+        return redirect(url_for('history'))
+
+    def relay():
+        try:
+            yield from response.iter_content(chunk_size=64 * 1024)
+        finally:
+            response.close()
+
+    return Response(stream_with_context(relay()), 200, {
+        'Content-Type': response.headers.get('Content-Type', 'text/csv'),
+        'Content-Disposition': response.headers.get('Content-Disposition', 'attachment; filename=expense_history.csv')
+    })
 
 @app.route('/history/delete/<date>', methods=['POST'])
 def delete_history(date):
     if 'user_id' not in session:
         return redirect(url_for('login'))
     try:
-        response = requests.post(f'http://127.0.0.1:8001/history/delete/{date}')
+        response = backend.post(f'{BACKEND_URL}/history/delete/{date}', headers=backend_headers(), timeout=BACKEND_TIMEOUT)
         response.raise_for_status()
         flash(response.json().get('message', _('Expense deleted successfully!')), 'success')
     except requests.exceptions.RequestException as e:
         flash(_('Error deleting expense: ') + str(e), 'danger')
-        print(f"Error deleting expense: {e}")
+        log.error("Error deleting expenses", date=date, error=str(e))
     return redirect(url_for('history'))
 
 @app.route('/upload', methods=['GET', 'POST'])
@@ -226,60 +302,121 @@ def upload():
         try:
             files = {'file': (file.filename, file.stream, file.content_type)}
             current_lang = get_locale()
-            response = requests.post(
-                'http://127.0.0.1:8001/upload_statement',
+            response = backend.post(
+                f'{BACKEND_URL}/upload_statement',
                 files=files,
-                headers={'Accept-Language': current_lang}
+                headers={**backend_headers(), 'Accept-Language': current_lang},
+                timeout=UPLOAD_TIMEOUT
             )
             response.raise_for_status()
             result = response.json()
-            flash(result.get('message', _('File processed successfully')), 'success')
-            return redirect(url_for('history'))
+            # The backend only spools and queues the file; the progress page polls the job from here.
+            flash(result.get('message', _('Statement queued for import.')), 'success')
+            return redirect(url_for('import_progress', job_id=result['job_id']))
         except requests.exceptions.ConnectionError as e:
             flash(_('Error: Backend server is not running on port 8001.'), 'danger')
-            print(f"ConnectionError: {e}")
+            log.error("Backend unreachable during upload", error=str(e))
             return redirect(url_for('upload'))
         except requests.exceptions.HTTPError as e:
             flash(_('Error: Backend returned an error: ') + str(e), 'danger')
-            print(f"HTTPError: {e}")
-            print(f"Response text: {e.response.text if e.response else 'No response'}")
+            log.error("Backend rejected upload", error=str(e), response=e.response.text[:500] if e.response is not None else None)
             return redirect(url_for('upload'))
         except requests.exceptions.RequestException as e:
             flash(_('Error uploading file. Please try again.'), 'danger')
-            print(f"RequestException: {e}")
+            log.error("Error uploading statement", error=str(e))
             return redirect(url_for('upload'))
     return render_template('upload.html')
 
+def fetch_job(job_id):
+    try:
+        response = backend.get(f'{BACKEND_URL}/jobs/{job_id}', headers=backend_headers(), timeout=BACKEND_TIMEOUT)
+        return response.json(), response.status_code
+    except (requests.exceptions.RequestException, ValueError) as e:
+        log.error("Error fetching import job", job_id=job_id, error=str(e))
+        return {"detail": "Backend unavailable."}, 502
+
+@app.route('/upload/status/<job_id>')
+def upload_status(job_id):
+    if 'user_id' not in session:
+        return {"detail": "Not logged in."}, 401
+    return fetch_job(job_id)
+
+@app.route('/upload/jobs/<job_id>')
+def import_progress(job_id):
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    job, status = fetch_job(job_id)
+    page = render_template_string(
+        IMPORT_PROGRESS_TEMPLATE,
+        job=job if status == 200 else None,
+        detail=job.get('detail', _('Import job not found.')),
+        active_states=ACTIVE_JOB_STATES,
+        poll_seconds=IMPORT_POLL_SECONDS
+    )
+    return page, status
+
 @app.route('/parse_sms', methods=['GET', 'POST'])
 def parse_sms_endpoint():
     if 'user_id' not in session:
         return redirect(url_for('login'))
     if request.method == 'POST':
         sms_message = request.form['sms_message']
-        pattern = r"Debited INR (\d+\.?\d*) for ([\w\s]+) on (\d{4}-\d{2}-\d{2})"
-        match = re.match(pattern, sms_message)
-        if match:
-            amount, description, date = match.groups()
-            expense = {"amount": amount, "description": description, "category": "unknown", "transaction_type": "Card", "date": date}
-            description_lower = description.lower()
-            if "food" in description_lower or "lunch" in description_lower:
-                expense["category"] = "food"
-            elif "transport" in description_lower or "fuel" in description_lower:
-                expense["category"] = "transport"
-            elif "entertainment" in description_lower or "movie" in description_lower:
-                expense["category"] = "entertainment"
+        result = sms_templates.parse_message(sms_message)
+        if result and "date" not in result[1]["expense"]:
+            flash(_('Could not read a date from this SMS, so it was not added.'), 'danger')
+        elif result:
+            # Category is left to the backend's shared rules engine.
+            expense = result[1]["expense"]
             try:
-                response = requests.post('http://127.0.0.1:8001/add_expense', json=expense)
+                response = backend.post(f'{BACKEND_URL}/add_expense', json=expense, headers=backend_headers(), timeout=BACKEND_TIMEOUT)
                 response.raise_for_status()
                 flash(_('SMS parsed and expense added successfully!'), 'success')
             except requests.exceptions.RequestException as e:
                 flash(_('Error parsing SMS.'), 'danger')
-                print(f"Error parsing SMS: {e}")
+                log.error("Error adding parsed SMS expense", error=str(e))
         else:
             flash(_('Could not parse SMS. Ensure the format is: "Debited INR <amount> for <description> on <YYYY-MM-DD>"'), 'danger')
         return redirect(url_for('home_endpoint'))
     return render_template('parse_sms.html')
 
+def post_expense_batch(expenses, report):
+    try:
+        response = backend.post(f'{BACKEND_URL}/add_expenses', json=expenses, headers=backend_headers(), timeout=UPLOAD_TIMEOUT)
+        response.raise_for_status()
+        result = response.json()
+        report["added"] += result.get("added", 0)
+        report["already_imported"] += result.get("duplicates", 0)
+        report["failed"] += result.get("failed", 0)
+    except requests.exceptions.RequestException as e:
+        report["failed"] += len(expenses)
+        log.error("Error sending SMS batch", expenses=len(expenses), error=str(e))
+    report["batches"] += 1
+
+@app.route('/parse_sms/bulk', methods=['POST'])
+def parse_sms_bulk():
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    file = request.files.get('sms_file')
+    if file is None or not file.filename:
+        return {"detail": _("No file selected")}, 400
+    # The export is read line by line straight off the upload stream and
+    # forwarded in batches, so it never sits in memory as a whole.
+    stats = sms_templates.SMSImportStats()
+    report = {"added": 0, "already_imported": 0, "failed": 0, "batches": 0}
+    batch = []
+    lines = io.TextIOWrapper(file.stream, encoding='utf-8', errors='replace')
+    for expense in sms_templates.iter_sms_expenses(lines, stats):
+        expense["source"] = "sms"
+        batch.append(expense)
+        if len(batch) >= SMS_BATCH_SIZE:
+            post_expense_batch(batch, report)
+            batch = []
+    if batch:
+        post_expense_batch(batch, report)
+    report.update(stats.report())
+    log.info("Bulk SMS import finished", lines=report['lines'], matched=report['matched'], added=report['added'], seconds=report['seconds'])
+    return report
+
 @app.route('/profile', methods=['GET', 'POST'])
 def profile():
     if 'user_id' not in session:
@@ -303,16 +440,15 @@ def set_budget():
         return redirect(url_for('login'))
     budget = {"amount": request.form['budget']}
     try:
-        response = requests.post('http://127.0.0.1:8001/set_budget', json=budget)
+        response = backend.post(f'{BACKEND_URL}/set_budget', json=budget, headers=backend_headers(), timeout=BACKEND_TIMEOUT)
         response.raise_for_status()
         flash(_('Budget set successfully!'), 'success')
     except requests.exceptions.RequestException as e:
         flash(_('Error setting budget: ') + str(e), 'danger')
-        print(f"Error setting budget: {e}")
+        log.error("Error setting budget", error=str(e))
     return redirect(url_for('home_endpoint'))
 
 if __name__ == '__main__':
-    print("Attempting to start Flask app...")
     port = 5000
     max_attempts = 10
     attempt = 0
@@ -321,24 +457,22 @@ if __name__ == '__main__':
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             result = sock.connect_ex(('127.0.0.1', port))
             if result != 0:  # Port is free
-                print(f"Port {port} is free. Starting server...")
+                log.info("Starting frontend", port=port)
                 app.run(debug=True, port=port, host='0.0.0.0')
-                print(f"Frontend running on http://{socket.gethostbyname(socket.gethostname())}:{port}")
                 break
             else:
-                print(f"Port {port} is in use. Trying {port + 1}...")
+                log.info("Port in use, trying the next one", port=port)
                 port += 1
                 attempt += 1
         except Exception as e:
-            print(f"Error checking port {port}: {e}")
+            log.error("Error checking port", port=port, error=str(e))
             attempt += 1
         finally:
             sock.close()
     if attempt >= max_attempts:
-        print(f"Failed to find a free port after {max_attempts} attempts. Last tried port: {port}")
+        log.error("No free port found", attempts=max_attempts, last_port=port)
     else:
         try:
             app.run(debug=True, port=port, host='0.0.0.0')
         except Exception as e:
-            print(f"Failed to start frontend on port {port}: {e}")
-            traceback.print_exc()
\ No newline at end of file
+            log.critical("Failed to start frontend", port=port, error=str(e), exc_info=True)
\ No newline at end of file
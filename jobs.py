@@ -0,0 +1,134 @@
+import os
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+import observability
+
+MAX_ERRORS = 50
+log = observability.get_logger(__name__)
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobProgress:
+    """Handle passed to a job handler for reporting progress as it goes; ``user_id`` is the job's owner."""
+
+    def __init__(self, manager: "JobManager", job_id: str, user_id: Optional[str] = None):
+        self.manager = manager
+        self.job_id = job_id
+        self.user_id = user_id
+
+    def update(self, **fields: Any) -> None:
+        self.manager.storage.update_job(self.job_id, fields)
+
+    def error(self, message: str) -> None:
+        # Capped so a statement full of unreadable rows can't bloat the job document.
+        self.manager.storage.record_job_error(self.job_id, message, MAX_ERRORS)
+
+
+class JobManager:
+    """Runs long imports off the request thread.
+
+    Uploads are spooled to their own file under ``spool_dir`` and queued on a
+    fixed pool of ``workers`` threads; at most ``max_queued`` jobs may wait
+    behind them before ``submit`` refuses new work. Job state lives in
+    ``storage`` so any request can poll it.
+    """
+
+    def __init__(self, storage, handlers: Dict[str, Callable[[str, JobProgress], Dict[str, Any]]],
+                 workers: int = 2, max_queued: int = 16, spool_dir: Optional[str] = None):
+        self.storage = storage
+        self.handlers = handlers
+        self.workers = workers
+        self.spool_dir = spool_dir or os.path.join(tempfile.gettempdir(), "expense_imports")
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="import-job")
+        self._slots = threading.BoundedSemaphore(workers + max_queued)
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def recover(self) -> int:
+        # Jobs that were queued or running when the process died will never finish.
+        return self.storage.fail_jobs(
+            ["queued", "running"],
+            {"status": "failed", "finished_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")},
+            "Interrupted by a server restart."
+        )
+
+    def spool(self, file_storage, suffix: str = ".pdf") -> str:
+        fd, path = tempfile.mkstemp(prefix="statement-", suffix=suffix, dir=self.spool_dir)
+        with os.fdopen(fd, "wb") as spool_file:
+            file_storage.save(spool_file)
+        return path
+
+    def submit(self, kind: str, path: str, filename: str = "", user_id: Optional[str] = None) -> Dict[str, Any]:
+        if not self._slots.acquire(blocking=False):
+            os.remove(path)
+            raise JobQueueFull("Too many imports are already queued.")
+        job = {
+            "_id": uuid.uuid4().hex,
+            "kind": kind,
+            "user_id": user_id,
+            "filename": filename,
+            "status": "queued",
+            "pages_done": 0,
+            "pages_total": None,
+            "transactions": 0,
+            "duplicates": 0,
+            "errors": [],
+            "error_count": 0,
+            "result": None,
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "started_at": None,
+            "finished_at": None
+        }
+        try:
+            self.storage.insert_job(job)
+            self._executor.submit(self._run, job["_id"], kind, path, user_id)
+        except Exception:
+            self._slots.release()
+            os.remove(path)
+            raise
+        return self.serialize(job)
+
+    def _run(self, job_id: str, kind: str, path: str, user_id: Optional[str] = None) -> None:
+        with self._lock:
+            self._active += 1
+        progress = JobProgress(self, job_id, user_id)
+        progress.update(status="running", started_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        try:
+            result = self.handlers[kind](path, progress)
+            progress.update(status="done", result=result, finished_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        except Exception as e:
+            log.exception("Job failed", job_id=job_id, kind=kind, error=str(e))
+            progress.error(str(e))
+            progress.update(status="failed", finished_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        finally:
+            with self._lock:
+                self._active -= 1
+            self._slots.release()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.storage.get_job(job_id)
+        return self.serialize(job) if job else None
+
+    def serialize(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        job = dict(job)
+        job["job_id"] = job.pop("_id")
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": self.workers, "active": self._active, "jobs": self.storage.job_counts()}
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
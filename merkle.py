@@ -0,0 +1,77 @@
+import hashlib
+import json
+from typing import Any, Dict, List
+
+# Leaves and interior nodes are domain-separated so a leaf can never be
+# replayed as an interior node (second-preimage attack on the tree).
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+EMPTY_ROOT = hashlib.sha256(b'').hexdigest()
+
+
+def leaf_hash(transaction: Dict[str, Any]) -> str:
+    return hashlib.sha256(LEAF_PREFIX + json.dumps(transaction, sort_keys=True).encode()).hexdigest()
+
+
+def node_hash(left: str, right: str) -> str:
+    return hashlib.sha256(NODE_PREFIX + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def _next_level(level: List[str]) -> List[str]:
+    if len(level) % 2:
+        level = level + [level[-1]]
+    return [node_hash(level[i], level[i + 1]) for i in range(0, len(level), 2)]
+
+
+def merkle_root(leaves: List[str]) -> str:
+    if not leaves:
+        return EMPTY_ROOT
+    level = list(leaves)
+    while len(level) > 1:
+        level = _next_level(level)
+    return level[0]
+
+
+def merkle_proof(leaves: List[str], index: int) -> List[Dict[str, str]]:
+    if not 0 <= index < len(leaves):
+        raise IndexError(f"Leaf index {index} out of range for {len(leaves)} leaves")
+    path = []
+    level = list(leaves)
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        sibling = index ^ 1
+        path.append({"position": "left" if sibling < index else "right", "hash": level[sibling]})
+        level = _next_level(level)
+        index //= 2
+    return path
+
+
+def verify_proof(leaf: str, index: int, count: int, path: List[Dict[str, str]], root: str) -> bool:
+    """Check an audit path for leaf ``index`` of a tree over ``count`` leaves.
+
+    Odd levels are padded with a copy of their last node, so a tree also
+    "contains" copies that were never leaves (CVE-2012-2459). The path's
+    shape is therefore derived from ``index`` and ``count`` rather than taken
+    on trust: positions past the real leaves, steps on the wrong side, and a
+    padding copy that differs from its original are all rejected.
+    """
+    if not 0 <= index < count:
+        return False
+    current = leaf
+    width = count
+    for step in path:
+        if width <= 1:
+            return False
+        sibling = index ^ 1
+        if step["position"] != ("left" if sibling < index else "right"):
+            return False
+        if sibling >= width and step["hash"] != current:
+            return False
+        if step["position"] == "left":
+            current = node_hash(step["hash"], current)
+        else:
+            current = node_hash(current, step["hash"])
+        index //= 2
+        width = (width + 1) // 2
+    return width == 1 and current == root
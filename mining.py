@@ -0,0 +1,176 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+# Proofs are checked as sha256(str(proof**2 - previous_proof**2)) having
+# `difficulty` leading hex zeros, exactly like Blockchain.is_chain_valid.
+# Comparing raw digest bytes is equivalent: two hex zeros per zero byte, plus
+# a high nibble of zero when the difficulty is odd.
+
+
+def meets_difficulty(digest: bytes, difficulty: int) -> bool:
+    full, half = divmod(difficulty, 2)
+    if digest[:full] != bytes(full):
+        return False
+    return not half or digest[full] < 16
+
+
+def _scan(previous_proof: int, difficulty: int, start: int, count: int) -> Optional[int]:
+    full, half = divmod(difficulty, 2)
+    zeros = bytes(full)
+    sha256 = hashlib.sha256
+    # proof**2 - previous**2 is advanced incrementally ((n+1)**2 = n**2 + 2n + 1)
+    # instead of squaring a bignum on every attempt.
+    value = start * start - previous_proof * previous_proof
+    for nonce in range(start, start + count):
+        digest = sha256(b'%d' % value).digest()
+        if digest[:full] == zeros and (not half or digest[full] < 16):
+            return nonce
+        value += 2 * nonce + 1
+    return None
+
+
+_solved_job = None
+
+
+def _init_worker(solved_job) -> None:
+    global _solved_job
+    _solved_job = solved_job
+
+
+def _search(previous_proof: int, difficulty: int, worker: int, workers: int, batch: int, job_id: int) -> Tuple[Optional[int], int]:
+    # Worker k scans chunks k, k + workers, k + 2 * workers, ... and checks the
+    # shared cancellation flag once per chunk.
+    attempts = 0
+    chunk = worker
+    while _solved_job.value < job_id:
+        start = 1 + chunk * batch
+        nonce = _scan(previous_proof, difficulty, start, batch)
+        if nonce is not None:
+            return nonce, attempts + nonce - start + 1
+        attempts += batch
+        chunk += workers
+    return None, attempts
+
+
+class MiningEngine:
+    def __init__(self, workers: Optional[int] = None, batch: int = 4096):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.batch = batch
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._solved_job = None
+        self._job_id = 0
+        self._lock = threading.Lock()
+        self.last_attempts = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._solved_job = multiprocessing.Value('q', 0, lock=False)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self._solved_job,)
+            )
+        return self._executor
+
+    def mine(self, previous_proof: int, difficulty: int) -> int:
+        if self.workers == 1:
+            start = 1
+            while True:
+                nonce = _scan(previous_proof, difficulty, start, self.batch)
+                if nonce is not None:
+                    self.last_attempts = nonce
+                    return nonce
+                start += self.batch
+
+        with self._lock:
+            executor = self._get_executor()
+            self._job_id += 1
+            job_id = self._job_id
+            pending = {
+                executor.submit(_search, previous_proof, difficulty, worker, self.workers, self.batch, job_id)
+                for worker in range(self.workers)
+            }
+            solutions = []
+            attempts = 0
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    nonce, tried = future.result()
+                    attempts += tried
+                    if nonce is not None:
+                        solutions.append(nonce)
+                        self._solved_job.value = job_id
+            self.last_attempts = attempts
+            return min(solutions)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+def legacy_proof_of_work(previous_proof: int, difficulty: int) -> int:
+    new_proof = 1
+    while True:
+        hash_operation = hashlib.sha256(str(new_proof ** 2 - previous_proof ** 2).encode()).hexdigest()
+        if hash_operation[:difficulty] == "0" * difficulty:
+            return new_proof
+        new_proof += 1
+
+
+def benchmark(difficulties: List[int], blocks: int, workers: int, batch: int) -> Dict[str, Any]:
+    engine = MiningEngine(workers=workers, batch=batch)
+    if engine.workers > 1:
+        # Spawn the pool up front so process start-up isn't billed to the first block.
+        engine.mine(1, 1)
+    results = []
+    for difficulty in difficulties:
+        previous_proofs = []
+        previous_proof = 1
+        elapsed = 0.0
+        attempts = 0
+        for _ in range(blocks):
+            started = time.perf_counter()
+            proof = engine.mine(previous_proof, difficulty)
+            elapsed += time.perf_counter() - started
+            attempts += engine.last_attempts
+            digest = hashlib.sha256(str(proof ** 2 - previous_proof ** 2).encode()).hexdigest()
+            assert digest[:difficulty] == "0" * difficulty
+            previous_proofs.append(previous_proof)
+            previous_proof = proof
+        result = {
+            "difficulty": difficulty,
+            "blocks": blocks,
+            "avg_seconds_per_block": round(elapsed / blocks, 6),
+            "hashes_per_second": round(attempts / elapsed) if elapsed else None,
+        }
+        # The single-core hex-prefix loop is far too slow to time above difficulty 5.
+        if difficulty <= 5:
+            legacy_elapsed = 0.0
+            legacy_attempts = 0
+            for previous_proof in previous_proofs:
+                started = time.perf_counter()
+                legacy_attempts += legacy_proof_of_work(previous_proof, difficulty)
+                legacy_elapsed += time.perf_counter() - started
+            result["legacy_avg_seconds_per_block"] = round(legacy_elapsed / blocks, 6)
+            result["legacy_hashes_per_second"] = round(legacy_attempts / legacy_elapsed) if legacy_elapsed else None
+        results.append(result)
+    engine.shutdown()
+    return {"workers": engine.workers, "batch": batch, "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the proof-of-work miner")
+    parser.add_argument("--difficulties", type=int, nargs="+", default=[3, 4, 5, 6])
+    parser.add_argument("--blocks", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch", type=int, default=4096)
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.difficulties, args.blocks, args.workers, args.batch), indent=2))
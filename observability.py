@@ -0,0 +1,263 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from flask import Response, g, request
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+# Each distinct message may be logged LOG_BURST times at once and then
+# LOG_RATE_PER_SECOND times a second; the rest are counted and dropped.
+LOG_RATE_PER_SECOND = float(os.environ.get('LOG_RATE_PER_SECOND', '5'))
+LOG_BURST = int(os.environ.get('LOG_BURST', '20'))
+LOGGER_ROOT = 'expense_tracker'
+
+# Seconds; wide enough for both a cached GET and a multi-page OCR import.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _label_text(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_label_text(self.labelnames, key)} {value}")
+        return "\n".join(lines)
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # Per label set: a count per bucket (not cumulative), then sum and count.
+        self.values: Dict[Tuple[str, ...], list] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        position = len(self.buckets)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                position = index
+                break
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][position] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for key, (counts, total, count) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = 'le="+Inf"' if bound == float('inf') else f'le="{bound!r}"'
+                    lines.append(f"{self.name}_bucket{_label_text(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_label_text(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_label_text(self.labelnames, key)} {count}")
+        return "\n".join(lines)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Any] = {}
+        self.lock = threading.Lock()
+
+    def _register(self, metric: Any) -> Any:
+        with self.lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+# Metrics live in the process that serves /metrics; OCR workers hand their
+# stage timings back with each page window (see statement_pipeline).
+REGISTRY = Registry()
+REQUEST_LATENCY = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Time spent handling HTTP requests.', ('app', 'method', 'endpoint', 'status'))
+STAGE_LATENCY = REGISTRY.histogram(
+    'stage_duration_seconds', 'Time spent in each processing stage.', ('stage',))
+LOG_SUPPRESSED = REGISTRY.counter(
+    'log_messages_suppressed_total', 'Log messages dropped by the rate limiter.', ('logger',))
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    STAGE_LATENCY.observe(seconds, stage=name)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - started, stage=name)
+
+
+def instrument(app: Any, name: str) -> None:
+    """Time every request to ``app`` and serve the registry on /metrics.
+
+    Call it right after creating the app so its hooks wrap everyone else's.
+    """
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_latency(response):
+        started = getattr(g, 'request_started', None)
+        if started is not None:
+            # The URL rule rather than the path keeps ids out of the label values.
+            endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+            REQUEST_LATENCY.observe(time.perf_counter() - started, app=name, method=request.method, endpoint=endpoint, status=response.status_code)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if getattr(record, 'suppressed', 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per logger and message template; drops are counted and reported on the next record that gets through."""
+
+    def __init__(self, rate: float = LOG_RATE_PER_SECOND, burst: int = LOG_BURST):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.buckets: Dict[Tuple[str, str], list] = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = [float(self.burst), now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                LOG_SUPPRESSED.inc(logger=record.name)
+                return False
+            bucket[0] -= 1
+            record.suppressed, bucket[2] = bucket[2], 0
+        return True
+
+
+class EventLogger(logging.LoggerAdapter):
+    """Logger that takes structured fields as keyword arguments: ``log.info("Expense added", expense_id=...)``."""
+
+    def process(self, msg: Any, kwargs: Dict[str, Any]) -> Tuple[Any, Dict[str, Any]]:
+        fields = {key: kwargs.pop(key) for key in list(kwargs) if key not in ('exc_info', 'stack_info', 'stacklevel', 'extra')}
+        kwargs['extra'] = {**kwargs.get('extra', {}), 'fields': fields}
+        return msg, kwargs
+
+
+_configured = False
+_configure_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _prepare(handler: logging.Handler) -> logging.Handler:
+    # Filters on a logger do not see records from its children; handlers do.
+    handler.addFilter(RateLimitFilter())
+    handler.setFormatter(JSONFormatter())
+    return handler
+
+
+def _use_direct_handler() -> None:
+    # A forked worker has the queue but not the listener thread draining it.
+    root = logging.getLogger(LOGGER_ROOT)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_prepare(logging.StreamHandler()))
+
+
+def configure() -> None:
+    """Send expense_tracker.* logs through a queue so request threads never block on the console.
+
+    Records are filtered and rendered to JSON on the calling thread; only the
+    write happens on the listener thread.
+    """
+    global _configured, _listener
+    with _configure_lock:
+        if _configured:
+            return
+        root = logging.getLogger(LOGGER_ROOT)
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        root.addHandler(_prepare(logging.handlers.QueueHandler(records)))
+        _listener = logging.handlers.QueueListener(records, logging.StreamHandler())
+        _listener.start()
+        atexit.register(_listener.stop)
+        os.register_at_fork(after_in_child=_use_direct_handler)
+        _configured = True
+
+
+def get_logger(name: str) -> EventLogger:
+    configure()
+    return EventLogger(logging.getLogger(f"{LOGGER_ROOT}.{name}"), {})
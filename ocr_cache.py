@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+def page_key(image: Any, settings: Dict[str, Any]) -> str:
+    # Keyed on the rendered pixels rather than the PDF, so the same page in two
+    # different exports hits; the settings make a dpi or language change miss.
+    digest = hashlib.sha256()
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    digest.update(f"{image.mode}:{image.size[0]}x{image.size[1]}".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+class OCRPageCache:
+    """Size-bounded LRU of recognised page text, stored in SQLite on disk.
+
+    Every OCR worker process opens the same file; SQLite's locking keeps the
+    processes consistent, and WAL mode lets readers proceed during a write.
+    Once the stored text exceeds ``max_bytes`` the least recently used pages
+    are evicted. Triggers keep the running total in ``ocr_usage`` so that no
+    write has to sum the whole table, whichever process made it.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            BEGIN IMMEDIATE;
+            CREATE TABLE IF NOT EXISTS ocr_pages (key TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS ocr_pages_last_used ON ocr_pages (last_used);
+            CREATE TABLE IF NOT EXISTS ocr_usage (id INTEGER PRIMARY KEY CHECK (id = 1), entries INTEGER NOT NULL, bytes INTEGER NOT NULL);
+            INSERT OR IGNORE INTO ocr_usage (id, entries, bytes) SELECT 1, COUNT(*), COALESCE(SUM(size), 0) FROM ocr_pages;
+            CREATE TRIGGER IF NOT EXISTS ocr_pages_added AFTER INSERT ON ocr_pages
+                BEGIN UPDATE ocr_usage SET entries = entries + 1, bytes = bytes + new.size WHERE id = 1; END;
+            CREATE TRIGGER IF NOT EXISTS ocr_pages_resized AFTER UPDATE OF size ON ocr_pages
+                BEGIN UPDATE ocr_usage SET bytes = bytes + new.size - old.size WHERE id = 1; END;
+            CREATE TRIGGER IF NOT EXISTS ocr_pages_removed AFTER DELETE ON ocr_pages
+                BEGIN UPDATE ocr_usage SET entries = entries - 1, bytes = bytes - old.size WHERE id = 1; END;
+            COMMIT;
+        """)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM ocr_pages WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE ocr_pages SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, text: str) -> None:
+        size = len(text.encode())
+        with self._lock:
+            # An upsert rather than INSERT OR REPLACE: REPLACE's implicit delete
+            # does not fire the trigger that keeps ocr_usage in step.
+            self._conn.execute(
+                "INSERT INTO ocr_pages (key, text, size, last_used) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET text = excluded.text, size = excluded.size, last_used = excluded.last_used",
+                (key, text, size, time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT bytes FROM ocr_usage WHERE id = 1").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM ocr_pages ORDER BY last_used"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM ocr_pages WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def usage(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, stored = self._conn.execute("SELECT entries, bytes FROM ocr_usage WHERE id = 1").fetchone()
+        return {"path": self.path, "entries": entries, "bytes": stored, "max_bytes": self.max_bytes}
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        stats = self.usage()
+        stats.update(
+            hits=self.hits,
+            misses=self.misses,
+            hit_rate=round(self.hits / lookups, 4) if lookups else None,
+            evictions=self.evictions
+        )
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def open_cache(path: Optional[str], max_bytes: int) -> Optional[OCRPageCache]:
+    if not path:
+        return None
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    return OCRPageCache(path, max_bytes)
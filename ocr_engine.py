@@ -0,0 +1,117 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import easyocr
+
+import observability
+
+log = observability.get_logger(__name__)
+
+
+class OCREngine:
+    """Pool of warm EasyOCR readers.
+
+    Loading an ``easyocr.Reader`` pulls the detection and recognition models
+    off disk, so readers are created at most ``pool_size`` times and then lent
+    out to callers one at a time. Statement OCR runs one single-reader engine
+    per worker process (see statement_pipeline).
+    """
+
+    def __init__(self, languages: Optional[List[str]] = None, pool_size: int = 1, gpu: bool = False):
+        self.languages = languages or ['en']
+        self.pool_size = max(1, pool_size)
+        self.gpu = gpu
+        self._idle: "queue.Queue[Any]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._load_times: List[float] = []
+        self._acquisitions = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+
+    def _load_reader(self) -> Any:
+        started = time.perf_counter()
+        reader = easyocr.Reader(self.languages, gpu=self.gpu)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._load_times.append(elapsed)
+        log.info("OCR reader loaded", reader=len(self._load_times), pool_size=self.pool_size, seconds=round(elapsed, 2))
+        return reader
+
+    def _reserve_slot(self) -> bool:
+        with self._lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                return True
+            return False
+
+    def warm_up(self, count: Optional[int] = None) -> None:
+        target = self.pool_size if count is None else min(count, self.pool_size)
+        while True:
+            with self._lock:
+                if self._created >= target:
+                    return
+            if not self._reserve_slot():
+                return
+            try:
+                self._idle.put(self._load_reader())
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+    def _acquire(self, timeout: Optional[float]) -> Any:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        if self._reserve_slot():
+            try:
+                return self._load_reader()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        started = time.perf_counter()
+        reader = self._idle.get(timeout=timeout)
+        with self._lock:
+            self._waits += 1
+            self._wait_seconds += time.perf_counter() - started
+        return reader
+
+    @contextmanager
+    def reader(self, timeout: Optional[float] = None):
+        reader = self._acquire(timeout)
+        with self._lock:
+            self._in_use += 1
+            self._acquisitions += 1
+        try:
+            yield reader
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._idle.put(reader)
+
+    def readtext(self, image: Any, **kwargs: Any) -> List[Any]:
+        with self.reader() as reader:
+            return reader.readtext(image, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "languages": self.languages,
+                "pool_size": self.pool_size,
+                "readers_loaded": self._created,
+                "readers_in_use": self._in_use,
+                "readers_idle": self._idle.qsize(),
+                "utilisation": self._in_use / self.pool_size,
+                "acquisitions": self._acquisitions,
+                "waits": self._waits,
+                "wait_seconds": round(self._wait_seconds, 4),
+                "load_seconds_total": round(sum(self._load_times), 4),
+                "load_seconds_last": round(self._load_times[-1], 4) if self._load_times else None,
+            }
@@ -0,0 +1,187 @@
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+SAMPLE_STATEMENTS = ["PhonePe_Statement_Feb2025_Apr2025.pdf", "PhonePe_Statement_Mar2025_Apr2025_removed.pdf"]
+
+
+def settings_from_env() -> Dict[str, Any]:
+    return {
+        "grayscale": os.environ.get('OCR_GRAYSCALE', '1') == '1',
+        "binarize": os.environ.get('OCR_BINARIZE', '1') == '1',
+        "deskew": os.environ.get('OCR_DESKEW', '1') == '1',
+        "crop_table": os.environ.get('OCR_CROP_TABLE', '1') == '1',
+        "max_skew": float(os.environ.get('OCR_MAX_SKEW', '5.0')),
+        "margin": int(os.environ.get('OCR_CROP_MARGIN', '12')),
+    }
+
+
+def to_grayscale(image: Any) -> np.ndarray:
+    if image.mode == "L":
+        return np.asarray(image)
+    return cv2.cvtColor(np.asarray(image.convert("RGB")), cv2.COLOR_RGB2GRAY)
+
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    # Otsu picks the threshold per page, which copes with both the crisp
+    # rendering of a digital statement and a washed-out scan.
+    return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+
+def _ink(gray: np.ndarray) -> np.ndarray:
+    return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
+
+
+def estimate_skew(gray: np.ndarray) -> float:
+    coords = cv2.findNonZero(_ink(gray))
+    if coords is None or len(coords) < 100:
+        return 0.0
+    angle = cv2.minAreaRect(coords)[-1]
+    # OpenCV 4.5+ reports minAreaRect angles in (0, 90], older and newer
+    # releases in [-90, 0); fold either into (-45, 45].
+    if angle < -45:
+        angle += 90
+    elif angle > 45:
+        angle -= 90
+    return float(angle)
+
+
+def rotate(gray: np.ndarray, angle: float) -> np.ndarray:
+    height, width = gray.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(gray, matrix, (width, height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=255)
+
+
+def find_table_region(gray: np.ndarray, margin: int = 12) -> Tuple[Tuple[int, int, int, int], str]:
+    """Return the (top, bottom, left, right) box worth recognising.
+
+    Statement tables are ruled with long horizontal lines between rows, so the
+    first and last of those bound the transactions. Pages without rules are
+    trimmed to the bounding box of their ink instead.
+    """
+    height, width = gray.shape[:2]
+    ink = _ink(gray)
+    # Row rules and the header band are pale grey, well above the Otsu ink
+    # threshold, so they are picked out as any long run of non-white pixels.
+    pale = cv2.threshold(gray, 245, 255, cv2.THRESH_BINARY_INV)[1]
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(1, width // 2), 1))
+    rules = cv2.morphologyEx(pale, cv2.MORPH_OPEN, kernel)
+    rule_rows = np.flatnonzero(rules.any(axis=1))
+    if len(rule_rows) >= 2 and rule_rows[-1] - rule_rows[0] > height // 10:
+        rule_cols = np.flatnonzero(rules.any(axis=0))
+        top, bottom = int(rule_rows[0]), int(rule_rows[-1])
+        left, right = int(rule_cols[0]), int(rule_cols[-1])
+        method = "rules"
+    else:
+        coords = cv2.findNonZero(ink)
+        if coords is None:
+            return (0, height, 0, width), "none"
+        left, top, box_width, box_height = cv2.boundingRect(coords)
+        bottom, right = top + box_height, left + box_width
+        method = "ink"
+    return (max(0, top - margin), min(height, bottom + margin), max(0, left - margin), min(width, right + margin)), method
+
+
+def preprocess(image: Any, settings: Dict[str, Any]) -> Tuple[np.ndarray, Dict[str, Any]]:
+    info: Dict[str, Any] = {"size": [image.size[0], image.size[1]]}
+    if settings.get("grayscale", True) or settings.get("binarize") or settings.get("deskew") or settings.get("crop_table"):
+        pixels = to_grayscale(image)
+    else:
+        return np.asarray(image.convert("RGB")), info
+    if settings.get("deskew"):
+        angle = estimate_skew(pixels)
+        if 0.1 < abs(angle) <= settings.get("max_skew", 5.0):
+            pixels = rotate(pixels, angle)
+            info["skew"] = round(angle, 2)
+    if settings.get("crop_table"):
+        (top, bottom, left, right), method = find_table_region(pixels, settings.get("margin", 12))
+        pixels = pixels[top:bottom, left:right]
+        info["crop"] = {"method": method, "box": [top, bottom, left, right]}
+    if settings.get("binarize"):
+        pixels = binarize(pixels)
+    info["pixels_kept"] = round(pixels.shape[0] * pixels.shape[1] / (image.size[0] * image.size[1]), 4)
+    return pixels, info
+
+
+def _match_counts(expected: Counter, found: Counter) -> Dict[str, Any]:
+    matched = sum((expected & found).values())
+    total_found = sum(found.values())
+    total_expected = sum(expected.values())
+    return {
+        "matched": matched,
+        "precision": round(matched / total_found, 4) if total_found else None,
+        "recall": round(matched / total_expected, 4) if total_expected else None,
+    }
+
+
+def compare(pdf_paths: List[str], dpis: List[int], baseline_dpi: int = 200, settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """OCR each statement raw and preprocessed and score both against its text layer."""
+    from pdf2image import convert_from_path
+
+    from fingerprints import normalize_description
+    from ocr_engine import OCREngine
+    from statement_pipeline import POPPLER_PATH, iter_text_layer, parse_transactions
+
+    settings = settings or settings_from_env()
+    engine = OCREngine(pool_size=1)
+    engine.warm_up()
+    configurations = [("raw", baseline_dpi, None)] + [(f"preprocessed@{dpi}", dpi, settings) for dpi in dpis]
+
+    def keys(transactions):
+        strict = Counter((t["date"], t["amount"], normalize_description(t["description"])) for t in transactions)
+        loose = Counter((t["date"], t["amount"]) for t in transactions)
+        return strict, loose
+
+    report = []
+    for pdf_path in pdf_paths:
+        truth = [t for _, text in iter_text_layer(pdf_path) for t in parse_transactions(text, "text")[0]]
+        expected_strict, expected_loose = keys(truth)
+        results = []
+        for name, dpi, config in configurations:
+            started = time.perf_counter()
+            images = convert_from_path(pdf_path, dpi=dpi, poppler_path=POPPLER_PATH)
+            rendered = time.perf_counter()
+            found = []
+            kept = []
+            for image in images:
+                if config is None:
+                    pixels = np.array(image)
+                else:
+                    pixels, info = preprocess(image, config)
+                    kept.append(info["pixels_kept"])
+                text = "\n".join(engine.readtext(pixels, detail=0))
+                found.extend(parse_transactions(text)[0])
+                image.close()
+            finished = time.perf_counter()
+            found_strict, found_loose = keys(found)
+            results.append({
+                "configuration": name,
+                "dpi": dpi,
+                "seconds": round(finished - started, 3),
+                "render_seconds": round(rendered - started, 3),
+                "ocr_seconds": round(finished - rendered, 3),
+                "pixels_kept": round(sum(kept) / len(kept), 4) if kept else 1.0,
+                "transactions_found": len(found),
+                "date_amount": _match_counts(expected_loose, found_loose),
+                "exact": _match_counts(expected_strict, found_strict),
+            })
+        baseline = results[0]["seconds"]
+        for result in results:
+            result["speedup"] = round(baseline / result["seconds"], 2) if result["seconds"] else None
+        report.append({"statement": os.path.basename(pdf_path), "text_layer_transactions": len(truth), "results": results})
+    return {"settings": settings, "statements": report}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare OCR speed and accuracy with and without page preprocessing")
+    parser.add_argument("pdfs", nargs="*", default=SAMPLE_STATEMENTS)
+    parser.add_argument("--dpi", type=int, nargs="+", default=[200, 150])
+    parser.add_argument("--baseline-dpi", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(compare(args.pdfs, args.dpi, args.baseline_dpi), indent=2))
@@ -0,0 +1,172 @@
+import time
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Tuple
+
+import observability
+
+# Expenses are stored with an integer ``amount_paise`` and real datetimes for
+# ``date`` and ``created_at``; the API keeps speaking rupees and strings.
+DATE_FORMAT = "%Y-%m-%d"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+MIGRATION_ID = "migration:typed_expenses"
+log = observability.get_logger(__name__)
+
+USER_MIGRATION_ID = "migration:user_partitioning"
+
+# Every expense query carries a user_id and every index leads with it, so a
+# user's reads touch only their own entries. The hashed index backs a
+# {user_id: "hashed"} shard key, which keeps each of those queries on one shard.
+def expense_indexes() -> List[Tuple[list, Dict[str, Any]]]:
+    from pymongo import ASCENDING, DESCENDING, HASHED
+
+    return [
+        ([("user_id", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)], {}),
+        ([("user_id", ASCENDING), ("category", ASCENDING), ("date", DESCENDING)], {}),
+        ([("user_id", ASCENDING), ("created_at", DESCENDING)], {}),
+        ([("user_id", ASCENDING), ("fingerprint", ASCENDING)], {
+            "unique": True,
+            "partialFilterExpression": {"fingerprint": {"$exists": True}}
+        }),
+        ([("user_id", HASHED)], {}),
+    ]
+
+# The global indexes these replaced; the old unique fingerprint index would
+# stop two users from importing the same statement.
+SUPERSEDED_INDEXES = ("date_-1__id_-1", "category_1_date_-1", "created_at_-1", "fingerprint_1")
+
+
+def to_paise(value: Any) -> int:
+    if isinstance(value, bool):
+        raise ValueError("Invalid amount.")
+    try:
+        amount = Decimal(str(value).replace(',', '').replace('₹', '').strip())
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value!r}")
+    if not amount.is_finite():
+        raise ValueError(f"Invalid amount: {value!r}")
+    return int((amount * 100).quantize(Decimal(1)))
+
+
+def to_date(value: Any) -> datetime:
+    # BSON has no date-only type, so a day is stored as midnight of that day.
+    if isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return datetime.strptime(str(value).strip()[:10], DATE_FORMAT)
+
+
+def to_timestamp(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime.strptime(str(value).strip(), TIMESTAMP_FORMAT)
+
+
+def paise_of(expense: Dict[str, Any]) -> int:
+    if isinstance(expense.get("amount_paise"), int):
+        return expense["amount_paise"]
+    try:
+        return to_paise(expense.get("amount", 0))
+    except ValueError:
+        return 0
+
+
+def date_key(value: Any) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.strftime(DATE_FORMAT)
+    return str(value or "")[:10]
+
+
+def normalize_expense(expense: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert an expense to its stored form in place; raises ValueError on bad input."""
+    if "amount" in expense:
+        expense["amount_paise"] = to_paise(expense.pop("amount"))
+    if "date" in expense:
+        expense["date"] = to_date(expense["date"])
+    if "created_at" in expense:
+        expense["created_at"] = to_timestamp(expense["created_at"])
+    return expense
+
+
+def serialize_expense(expense: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the API form of a stored (or not yet migrated) expense."""
+    data = {key: value for key, value in expense.items() if key != "amount_paise"}
+    if "amount_paise" in expense or "amount" in expense:
+        data["amount"] = paise_of(expense) / 100
+    if "date" in expense:
+        data["date"] = date_key(expense["date"])
+    if isinstance(expense.get("created_at"), datetime):
+        data["created_at"] = expense["created_at"].strftime(TIMESTAMP_FORMAT)
+    return data
+
+
+def ensure_indexes(expenses_collection) -> None:
+    existing = expenses_collection.index_information()
+    for name in SUPERSEDED_INDEXES:
+        if name in existing:
+            expenses_collection.drop_index(name)
+    for keys, options in expense_indexes():
+        expenses_collection.create_index(keys, **options)
+
+
+def migrate_expenses(expenses_collection, meta_collection, batch_size: int = 500) -> Dict[str, Any]:
+    """Rewrite legacy string amounts and dates, resuming from the last finished batch.
+
+    Progress is checkpointed in ``meta`` after every batch, so an interrupted
+    run picks up where it stopped instead of rescanning the collection.
+    """
+    from pymongo import ASCENDING, UpdateOne
+
+    state = meta_collection.find_one({"_id": MIGRATION_ID}) or {}
+    if state.get("done"):
+        return state
+    started = time.perf_counter()
+    last_id = state.get("last_id")
+    migrated = state.get("migrated", 0)
+    invalid = state.get("invalid", 0)
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        batch = list(expenses_collection.find(query, {"amount": 1, "amount_paise": 1, "date": 1, "created_at": 1}).sort("_id", ASCENDING).limit(batch_size))
+        if not batch:
+            break
+        updates = []
+        for expense in batch:
+            changes: Dict[str, Any] = {}
+            unset: Dict[str, Any] = {}
+            if "amount" in expense:
+                try:
+                    changes["amount_paise"] = to_paise(expense["amount"])
+                except ValueError:
+                    changes["amount_paise"] = 0
+                    changes["amount_invalid"] = str(expense["amount"])
+                    invalid += 1
+                unset["amount"] = ""
+            for field, convert in (("date", to_date), ("created_at", to_timestamp)):
+                if field in expense and not isinstance(expense[field], datetime):
+                    try:
+                        changes[field] = convert(expense[field])
+                    except ValueError:
+                        # Left as null so date aggregations skip it rather than fail.
+                        changes[field] = None
+                        changes[f"{field}_invalid"] = str(expense[field])
+                        invalid += 1
+            if changes or unset:
+                update: Dict[str, Any] = {"$set": changes} if changes else {}
+                if unset:
+                    update["$unset"] = unset
+                updates.append(UpdateOne({"_id": expense["_id"]}, update))
+        if updates:
+            expenses_collection.bulk_write(updates, ordered=False)
+        migrated += len(updates)
+        last_id = batch[-1]["_id"]
+        meta_collection.update_one(
+            {"_id": MIGRATION_ID},
+            {"$set": {"last_id": last_id, "migrated": migrated, "invalid": invalid}},
+            upsert=True
+        )
+    state = {"_id": MIGRATION_ID, "done": True, "last_id": last_id, "migrated": migrated, "invalid": invalid,
+             "finished_at": datetime.now().strftime(TIMESTAMP_FORMAT)}
+    meta_collection.replace_one({"_id": MIGRATION_ID}, state, upsert=True)
+    log.info("Typed expense migration finished", migrated=migrated, invalid=invalid, seconds=round(time.perf_counter() - started, 2))
+    return state
@@ -0,0 +1,54 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Tuple
+
+from categorizer import DEFAULT_CATEGORY
+from records import date_key, paise_of
+
+# Rollup documents are keyed "<user>:<kind>:<key>", e.g. "user1:day:2025-03-14",
+# "user1:month:2025-03" or "user1:category:Food", and hold a running total in paise and a count.
+KINDS = ("day", "month", "category")
+
+
+def amount_of(expense: Dict[str, Any]) -> float:
+    return paise_of(expense) / 100
+
+
+def rollup_keys(expense: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+    date = date_key(expense.get("date"))
+    return (
+        ("day", date),
+        ("month", date[:7]),
+        ("category", expense.get("category", DEFAULT_CATEGORY)),
+    )
+
+
+def _accumulate(expenses: Iterable[Dict[str, Any]], sign: int = 1) -> Dict[Tuple[str, str, str], list]:
+    totals = defaultdict(lambda: [0, 0])
+    for expense in expenses:
+        amount = paise_of(expense) * sign
+        for kind, key in rollup_keys(expense):
+            total = totals[(expense["user_id"], kind, key)]
+            total[0] += amount
+            total[1] += sign
+    return totals
+
+
+def apply_expenses(storage, expenses: Iterable[Dict[str, Any]], sign: int = 1) -> None:
+    totals = _accumulate(expenses, sign)
+    if totals:
+        storage.increment_rollups(totals)
+
+
+def remove_expenses(storage, expenses: Iterable[Dict[str, Any]]) -> None:
+    apply_expenses(storage, expenses, sign=-1)
+
+
+def read_totals(storage, user_id: str, kind: str) -> Dict[str, float]:
+    return {key: total / 100 for key, total in storage.rollup_totals(user_id, kind).items()}
+
+
+def rebuild(storage, batch_size: int = 1000) -> int:
+    fields = ("user_id", "amount", "amount_paise", "date", "category")
+    totals = _accumulate(storage.find_expenses({}, fields, sort=None, batch_size=batch_size))
+    storage.replace_rollups(totals, batch_size)
+    return len(totals)
@@ -0,0 +1,138 @@
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import observability
+from blockchain import Blockchain
+
+log = observability.get_logger(__name__)
+
+
+class BlockSealer:
+    """Background worker that batches transactions into mined blocks.
+
+    Writers drop transactions into a mempool and get a pending receipt back
+    straight away; a single thread cuts a block once ``max_block_size``
+    transactions are waiting or the oldest one has waited ``max_wait``
+    seconds, then hands the sealed block to ``on_sealed``. Each block holds
+    one user's transactions: the oldest waiting user's, up to the size limit.
+    """
+
+    def __init__(self, blockchain: Blockchain, on_sealed: Callable[[Optional[Dict[str, Any]], List[Dict[str, Any]], Optional[str]], None],
+                 max_block_size: int = 200, max_wait: float = 2.0):
+        self.blockchain = blockchain
+        self.on_sealed = on_sealed
+        self.max_block_size = max_block_size
+        self.max_wait = max_wait
+        self._pending: List[Tuple[float, Optional[str], List[Dict[str, Any]]]] = []
+        self._pending_count = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._blocks_sealed = 0
+        self._transactions_sealed = 0
+        self._seal_seconds = 0.0
+        self._failures = 0
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="block-sealer", daemon=True)
+                self._thread.start()
+
+    def submit(self, transaction: Dict[str, Any], user_id: Optional[str] = None) -> Dict[str, Any]:
+        return self.submit_many([transaction], user_id)
+
+    def submit_many(self, transactions: List[Dict[str, Any]], user_id: Optional[str] = None) -> Dict[str, Any]:
+        receipt_id = uuid.uuid4().hex
+        with self._cond:
+            self._pending.append((time.monotonic(), user_id, list(transactions)))
+            self._pending_count += len(transactions)
+            self._cond.notify()
+            queued = self._pending_count
+        return {"receipt_id": receipt_id, "status": "pending", "queued": queued}
+
+    def _take_batch(self) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        # A submitted group is never split, so a bulk import lands in one block;
+        # other users' groups keep their place in the queue.
+        _queued_at, user_id, batch = self._pending.pop(0)
+        remaining = []
+        full = False
+        for entry in self._pending:
+            if not full and entry[1] == user_id:
+                if len(batch) + len(entry[2]) <= self.max_block_size:
+                    batch.extend(entry[2])
+                    continue
+                full = True
+            remaining.append(entry)
+        self._pending = remaining
+        self._pending_count -= len(batch)
+        return user_id, batch
+
+    def _seal(self, user_id: Optional[str], batch: List[Dict[str, Any]]) -> None:
+        started = time.perf_counter()
+        block = None
+        try:
+            self.blockchain.add_transactions(batch, user_id)
+            block = self.blockchain.get_latest_block()
+        except Exception as e:
+            self._failures += 1
+            log.error("Block sealing failed", user_id=user_id, transactions=len(batch), error=str(e))
+        elapsed = time.perf_counter() - started
+        try:
+            self.on_sealed(block, batch, user_id)
+        except Exception as e:
+            log.exception("Error recording sealed block", error=str(e))
+        if block is not None:
+            self._blocks_sealed += 1
+            self._transactions_sealed += len(batch)
+            self._seal_seconds += elapsed
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if self._pending_count >= self.max_block_size:
+                        break
+                    if self._pending:
+                        remaining = self.max_wait - (time.monotonic() - self._pending[0][0])
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                if self._stopped and not self._pending:
+                    return
+                user_id, batch = self._take_batch()
+            self._seal(user_id, batch)
+
+    def flush(self) -> None:
+        while True:
+            with self._cond:
+                if not self._pending:
+                    return
+                user_id, batch = self._take_batch()
+            self._seal(user_id, batch)
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            pending = self._pending_count
+            oldest_age = time.monotonic() - self._pending[0][0] if self._pending else 0.0
+        return {
+            "pending": pending,
+            "oldest_pending_seconds": round(oldest_age, 3),
+            "blocks_sealed": self._blocks_sealed,
+            "transactions_sealed": self._transactions_sealed,
+            "failures": self._failures,
+            "avg_seal_seconds": round(self._seal_seconds / self._blocks_sealed, 4) if self._blocks_sealed else None,
+            "max_block_size": self.max_block_size,
+            "max_wait": self.max_wait,
+        }
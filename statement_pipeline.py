@@ -0,0 +1,333 @@
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import PyPDF2
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+import observability
+import preprocess
+from ocr_cache import OCRPageCache, open_cache, page_key
+from ocr_engine import OCREngine
+
+POPPLER_PATH = os.environ.get('POPPLER_PATH', r"C:\Users\anuj2\Downloads\Release-24.08.0-0\poppler-24.08.0\Library\bin")
+PAGE_WINDOW = int(os.environ.get('OCR_PAGE_WINDOW', '2'))
+OCR_WORKERS = int(os.environ.get('OCR_WORKERS', '0')) or (os.cpu_count() or 1)
+OCR_DPI = int(os.environ.get('OCR_DPI', '200'))
+# Set OCR_PREPROCESS=0 to feed full colour pages to the recogniser as before.
+PREPROCESS_SETTINGS = preprocess.settings_from_env() if os.environ.get('OCR_PREPROCESS', '1') == '1' else None
+# Set OCR_CACHE_PATH to an empty string to disable the page cache.
+OCR_CACHE_PATH = os.environ.get('OCR_CACHE_PATH', 'ocr_cache.db')
+OCR_CACHE_BYTES = int(os.environ.get('OCR_CACHE_BYTES', str(256 * 1024 * 1024)))
+log = observability.get_logger(__name__)
+
+TRANSACTION_PATTERN = re.compile(r'(\w+\s\d{1,2},[\d]{4})\s+(?P<description>Paid to.*?)\s+DEBIT\s+(?P<amount>[₹<{\d,\.]+)', re.DOTALL)
+# PhonePe's embedded text layer lists date, time, type and amount before the
+# payee, so it needs its own pattern.
+TEXT_LAYER_PATTERN = re.compile(r'(\w{3} \d{1,2}, ?\d{4})\s+\d{1,2}:\d{2} [AP]M\s+DEBIT\s+(?P<amount>[₹<{\d,\.]+)\s+(?P<description>Paid to.*?)\s+Transaction ID', re.DOTALL)
+# Patterns tried per page source, most likely first.
+SOURCE_PATTERNS = {
+    "text": (TEXT_LAYER_PATTERN, TRANSACTION_PATTERN),
+    "ocr": (TRANSACTION_PATTERN, TEXT_LAYER_PATTERN),
+}
+
+
+def clean_amount(text: str) -> Optional[float]:
+    text = text.replace('₹', '').replace('{', '').replace('<', '').replace('>', '').replace('O', '0').replace('l', '1')
+    text = re.sub(r'[^\d.]', '', text)
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def parse_date(date: str) -> str:
+    try:
+        date_obj = datetime.strptime(date, '%b %d, %Y')
+    except ValueError:
+        date = date.replace(',', ', ')
+        date_obj = datetime.strptime(date, '%b %d, %Y')
+    return date_obj.strftime('%Y-%m-%d')
+
+
+def parse_transactions(text: str, source: str = "ocr") -> Tuple[List[Dict[str, Any]], List[str]]:
+    transactions = []
+    rejected = []
+    matches = []
+    for pattern in SOURCE_PATTERNS[source]:
+        matches = [(match.group(1), match.group("description"), match.group("amount")) for match in pattern.finditer(text)]
+        if matches:
+            break
+    for date, description, amount in matches:
+        cleaned_amount = clean_amount(amount)
+        if cleaned_amount is None:
+            rejected.append(amount)
+            continue
+        try:
+            formatted_date = parse_date(date)
+        except ValueError:
+            rejected.append(date)
+            continue
+        transactions.append({
+            "date": formatted_date,
+            "description": description.strip(),
+            "amount": cleaned_amount,
+        })
+    return transactions, rejected
+
+
+# Each worker process keeps a single warm reader, so the process pool is the
+# reader pool: OCR_WORKERS readers, loaded once per worker and reused.
+_worker_engine: Optional[OCREngine] = None
+_worker_cache: Optional[OCRPageCache] = None
+# Shared with the workers: how many are inside a window right now and their
+# total busy time, so /ocr/stats reports live utilisation.
+_busy_workers = multiprocessing.Value('i', 0)
+_busy_seconds = multiprocessing.Value('d', 0.0)
+_started_at: Optional[float] = None
+
+
+def _init_worker(busy_workers: Any, busy_seconds: Any) -> None:
+    global _worker_engine, _worker_cache, _busy_workers, _busy_seconds
+    _busy_workers, _busy_seconds = busy_workers, busy_seconds
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+    try:
+        _worker_cache = open_cache(OCR_CACHE_PATH, OCR_CACHE_BYTES)
+    except Exception as e:
+        log.warning("OCR page cache unavailable, every page will be recognised", error=str(e))
+    _worker_engine = OCREngine(pool_size=1)
+    _worker_engine.warm_up()
+
+
+def _worker_stats() -> Tuple[int, Dict[str, Any]]:
+    stats = _worker_engine.stats()
+    # A worker's single reader is always in use while it works; utilisation
+    # is measured across the workers instead (see ocr_stats).
+    for field in ("readers_in_use", "readers_idle", "utilisation"):
+        stats.pop(field, None)
+    stats["cache_hits"] = _worker_cache.hits if _worker_cache else 0
+    stats["cache_misses"] = _worker_cache.misses if _worker_cache else 0
+    stats["cache_evictions"] = _worker_cache.evictions if _worker_cache else 0
+    return os.getpid(), stats
+
+
+def _read_page(image: Any, timings: List[Tuple[str, float]]) -> str:
+    started = time.perf_counter()
+    if PREPROCESS_SETTINGS is None:
+        pixels = np.array(image)
+    else:
+        pixels = preprocess.preprocess(image, PREPROCESS_SETTINGS)[0]
+        timings.append(("preprocess", time.perf_counter() - started))
+    recognised = time.perf_counter()
+    text = "\n".join(_worker_engine.readtext(pixels, detail=0))
+    timings.append(("ocr", time.perf_counter() - recognised))
+    return text
+
+
+def _recognise(image: Any, dpi: int, timings: List[Tuple[str, float]]) -> str:
+    if _worker_cache is None:
+        return _read_page(image, timings)
+    key = page_key(image, {
+        "engine": "easyocr",
+        "languages": _worker_engine.languages,
+        "dpi": dpi,
+        "detail": 0,
+        "preprocess": PREPROCESS_SETTINGS
+    })
+    text = _worker_cache.get(key)
+    if text is None:
+        text = _read_page(image, timings)
+        _worker_cache.put(key, text)
+    return text
+
+
+@contextmanager
+def _busy() -> Iterator[None]:
+    started = time.perf_counter()
+    with _busy_workers.get_lock():
+        _busy_workers.value += 1
+    try:
+        yield
+    finally:
+        with _busy_workers.get_lock():
+            _busy_workers.value -= 1
+        with _busy_seconds.get_lock():
+            _busy_seconds.value += time.perf_counter() - started
+
+
+def _ocr_window(pdf_path: str, first_page: int, last_page: int, dpi: int) -> Tuple[Tuple[int, Dict[str, Any]], List[Tuple[int, str]], List[Tuple[str, float]]]:
+    with _busy():
+        return _read_window(pdf_path, first_page, last_page, dpi)
+
+
+def _read_window(pdf_path: str, first_page: int, last_page: int, dpi: int) -> Tuple[Tuple[int, Dict[str, Any]], List[Tuple[int, str]], List[Tuple[str, float]]]:
+    # Stage timings go back with the pages; the metrics live in the parent.
+    started = time.perf_counter()
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=first_page, last_page=last_page, poppler_path=POPPLER_PATH)
+    timings = [("rasterise", time.perf_counter() - started)]
+    pages = []
+    for offset, image in enumerate(images):
+        text = _recognise(image, dpi, timings)
+        image.close()
+        pages.append((first_page + offset, text))
+    return _worker_stats(), pages, timings
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+_worker_engine_stats: Dict[int, Dict[str, Any]] = {}
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor, _started_at
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(max_workers=OCR_WORKERS, initializer=_init_worker,
+                                                initargs=(_busy_workers, _busy_seconds))
+                _started_at = time.monotonic()
+    return _executor
+
+
+def warm_up() -> None:
+    executor = get_executor()
+    for future in [executor.submit(_worker_stats) for _ in range(OCR_WORKERS)]:
+        pid, stats = future.result()
+        _worker_engine_stats[pid] = stats
+
+
+_stats_cache: Optional[OCRPageCache] = None
+
+
+def cache_stats() -> Optional[Dict[str, Any]]:
+    global _stats_cache
+    if not OCR_CACHE_PATH or not os.path.exists(OCR_CACHE_PATH):
+        return None
+    if _stats_cache is None:
+        _stats_cache = OCRPageCache(OCR_CACHE_PATH, OCR_CACHE_BYTES)
+    # Lookups happen in the workers; this process only reads the file's size.
+    return _stats_cache.usage()
+
+
+def ocr_stats() -> Dict[str, Any]:
+    workers = dict(_worker_engine_stats)
+    hits = sum(stats.get("cache_hits", 0) for stats in workers.values())
+    misses = sum(stats.get("cache_misses", 0) for stats in workers.values())
+    cache = cache_stats()
+    if cache is not None:
+        cache.update(
+            hits=hits,
+            misses=misses,
+            hit_rate=round(hits / (hits + misses), 4) if hits + misses else None,
+            evictions=sum(stats.get("cache_evictions", 0) for stats in workers.values())
+        )
+    busy = _busy_workers.value
+    busy_seconds = _busy_seconds.value
+    uptime = time.monotonic() - _started_at if _started_at is not None else 0.0
+    return {
+        "workers": OCR_WORKERS,
+        "busy_workers": busy,
+        "idle_workers": OCR_WORKERS - busy,
+        "utilisation": round(busy / OCR_WORKERS, 4),
+        "busy_seconds_total": round(busy_seconds, 4),
+        "utilisation_since_start": round(busy_seconds / (uptime * OCR_WORKERS), 4) if uptime else None,
+        "page_window": PAGE_WINDOW,
+        "dpi": OCR_DPI,
+        "preprocess": PREPROCESS_SETTINGS,
+        "worker_engines": workers,
+        "load_seconds_total": round(sum(stats["load_seconds_total"] for stats in workers.values()), 4),
+        "page_cache": cache,
+    }
+
+
+def page_count(pdf_path: str) -> int:
+    return int(pdfinfo_from_path(pdf_path, poppler_path=POPPLER_PATH)["Pages"])
+
+
+def iter_ocr_pages(pdf_path: str, pages: List[int], window: int = PAGE_WINDOW, dpi: int = OCR_DPI) -> Iterator[Tuple[int, str]]:
+    windows = deque()
+    run: List[int] = []
+    for page in pages:
+        if run and (page != run[-1] + 1 or len(run) >= window):
+            windows.append((run[0], run[-1]))
+            run = []
+        run.append(page)
+    if run:
+        windows.append((run[0], run[-1]))
+
+    executor = get_executor()
+    max_in_flight = OCR_WORKERS * 2
+    in_flight = set()
+    while windows or in_flight:
+        while windows and len(in_flight) < max_in_flight:
+            first_page, last_page = windows.popleft()
+            in_flight.add(executor.submit(_ocr_window, pdf_path, first_page, last_page, dpi))
+        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            (pid, stats), page_texts, timings = future.result()
+            _worker_engine_stats[pid] = stats
+            for stage, seconds in timings:
+                observability.observe_stage(stage, seconds)
+            for page_no, text in page_texts:
+                yield page_no, text
+
+
+def iter_text_layer(pdf_path: str) -> Iterator[Tuple[int, str]]:
+    reader = PyPDF2.PdfReader(pdf_path)
+    for index, page in enumerate(reader.pages):
+        try:
+            with observability.stage("text_layer"):
+                text = page.extract_text() or ""
+        except Exception as e:
+            log.warning("Text layer extraction failed", page=index + 1, error=str(e))
+            text = ""
+        yield index + 1, text
+
+
+def _page_result(page_no: int, total: int, source: str, text: str) -> Dict[str, Any]:
+    with observability.stage("parse"):
+        transactions, rejected = parse_transactions(text, source)
+    return {
+        "page": page_no,
+        "pages_total": total,
+        "source": source,
+        "transactions": transactions,
+        "rejected": rejected,
+        "text": text,
+    }
+
+
+def stream_statement(pdf_path: str, window: int = PAGE_WINDOW, dpi: int = OCR_DPI) -> Iterator[Dict[str, Any]]:
+    # Digitally generated statements carry a text layer; only pages where it is
+    # missing or yields no transactions are rasterised and sent to OCR.
+    # Only reading the text layer is guarded: once a page has been yielded, a
+    # failure must not send it through OCR and hand the caller its rows twice.
+    try:
+        text_pages = list(iter_text_layer(pdf_path))
+    except Exception as e:
+        log.warning("Could not read text layer, falling back to OCR", error=str(e))
+        text_pages = [(page_no, "") for page_no in range(1, page_count(pdf_path) + 1)]
+    total = len(text_pages)
+    needs_ocr = []
+    for page_no, text in text_pages:
+        result = _page_result(page_no, total, "text", text) if text else None
+        if result and result["transactions"]:
+            yield result
+        else:
+            needs_ocr.append(page_no)
+
+    if needs_ocr:
+        for page_no, text in iter_ocr_pages(pdf_path, needs_ocr, window=window, dpi=dpi):
+            yield _page_result(page_no, total, "ocr", text)
@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture
+def storage(tmp_path):
+    from storage import SQLiteStorage
+
+    storage = SQLiteStorage(str(tmp_path / "expenses.db"))
+    yield storage
+    storage.close()
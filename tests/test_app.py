@@ -0,0 +1,183 @@
+import importlib
+import time
+
+import pytest
+
+import identity
+
+SECRET = b"shared-with-the-frontend"
+
+
+@pytest.fixture(scope="module")
+def backend(tmp_path_factory):
+    # app.py opens its storage and workers at import, so it is configured
+    # through the environment first, on a scratch SQLite file.
+    workdir = tmp_path_factory.mktemp("backend")
+    settings = {
+        "STORAGE_BACKEND": "sqlite",
+        "SQLITE_PATH": str(workdir / "expenses.db"),
+        "CATEGORY_MODEL_PATH": str(workdir / "category_model.pkl"),
+        "IMPORT_SPOOL_DIR": str(workdir / "spool"),
+        "OCR_CACHE_PATH": "",
+        "OCR_WARM_START": "0",
+        "USER_AUTH_SECRET": SECRET.decode(),
+        "ADMIN_USERS": "ops",
+    }
+    with pytest.MonkeyPatch.context() as patch:
+        for name, value in settings.items():
+            patch.setenv(name, value)
+        with patch.context() as during_import:
+            # Flask-Session puts its directory under the working directory.
+            during_import.chdir(workdir)
+            app = importlib.import_module("app")
+        app.app.config["TESTING"] = True
+        yield app.app.test_client()
+        app.sealer.stop()
+
+
+def as_user(user_id, secret=SECRET, **kwargs):
+    return identity.sign(secret, user_id, **kwargs)
+
+
+def add_expense(client, user_id, amount, date):
+    response = client.post("/add_expense", headers=as_user(user_id), json={
+        "amount": amount, "description": "groceries", "category": "Food", "date": date, "transaction_type": "UPI"
+    })
+    assert response.status_code == 200
+    return response.get_json()["expense_id"]
+
+
+def test_requests_without_a_valid_identity_are_refused(backend):
+    forged = as_user("alice")
+    forged[identity.USER_HEADER] = "bob"
+    for headers in ({}, {identity.USER_HEADER: "alice"}, forged, as_user("alice", secret=b"guessed"),
+                    as_user("alice", now=time.time() - 3600)):
+        assert backend.get("/history", headers=headers).status_code == 401
+    assert backend.get("/").status_code == 200
+    assert backend.get("/history", headers=as_user("alice")).status_code == 200
+
+
+def test_users_only_see_their_own_expenses(backend):
+    expense_id = add_expense(backend, "alice", 120, "2025-04-01")
+    add_expense(backend, "bob", 7, "2025-04-01")
+
+    history = backend.get("/history", headers=as_user("bob")).get_json()
+    assert [row["amount"] for row in history["history"]] == [7.0]
+    assert history["daily_totals"] == {"2025-04-01": 7.0}
+    assert backend.get(f"/expenses/{expense_id}/seal_status", headers=as_user("bob")).status_code == 404
+    assert backend.get(f"/expenses/{expense_id}/seal_status", headers=as_user("alice")).status_code == 200
+
+    backend.post("/history/delete/2025-04-01", headers=as_user("bob"))
+    alice = backend.get("/history", headers=as_user("alice")).get_json()
+    assert [row["amount"] for row in alice["history"]] == [120.0]
+
+
+def test_budgets_are_per_user(backend):
+    backend.post("/set_budget", headers=as_user("alice"), json={"amount": 5000})
+    assert backend.get("/budget", headers=as_user("alice")).get_json()["budget"] == 5000
+    assert backend.get("/budget", headers=as_user("carol")).get_json()["budget"] == 0
+
+
+@pytest.mark.parametrize("method, path", [
+    ("get", "/jobs/stats"),
+    ("get", "/sealer/stats"),
+    ("get", "/ocr/stats"),
+    ("get", "/classifier/stats"),
+    ("get", "/chain/validate"),
+])
+def test_process_wide_endpoints_are_admin_only(backend, method, path):
+    assert getattr(backend, method)(path, headers=as_user("alice")).status_code == 403
+    assert getattr(backend, method)(path, headers=as_user("ops")).status_code == 200
+
+
+def test_only_admins_change_the_shared_rules(backend):
+    rule = {"pattern": "metro card", "category": "Transport", "priority": 5}
+    assert backend.post("/categories/rules", headers=as_user("alice"), json=rule).status_code == 403
+    assert backend.post("/categories/rules", headers=as_user("ops"), json=rule).get_json()["added"] == 1
+    rules = backend.get("/categories/rules", headers=as_user("alice")).get_json()["rules"]
+    assert {"pattern": "metro card", "category": "Transport", "priority": 5} in rules
+
+
+def test_non_string_categories_are_rejected(backend):
+    response = backend.post("/add_expense", headers=as_user("dave"), json={"amount": 5, "description": "tea", "category": 5})
+    assert response.status_code == 400
+    assert backend.get("/history", headers=as_user("dave")).get_json()["history"] == []
+
+    response = backend.post("/add_expenses", headers=as_user("dave"), json=[
+        {"amount": 5, "description": "tea", "category": ["Food"], "date": "2025-04-02"},
+        {"amount": 6, "description": "something unusual", "date": "2025-04-02"},
+    ])
+    results = response.get_json()["results"]
+    assert response.status_code == 200
+    assert results[0] == {"index": 0, "status": "error", "detail": "Category must be a string."}
+    assert results[1]["status"] == "ok"
+
+
+def test_uncategorised_rows_share_the_engine_default(backend):
+    backend.post("/add_expense", headers=as_user("erin"), json={"amount": 3, "description": "qwzx", "date": "2025-04-03"})
+    backend.post("/add_expenses", headers=as_user("erin"), json=[{"amount": 4, "description": "zzqx", "date": "2025-04-03"}])
+    history = backend.get("/history", headers=as_user("erin")).get_json()["history"]
+    assert {row["category"] for row in history} == {"Others"}
+
+
+def test_reads_revalidate_until_the_users_data_changes(backend):
+    first = backend.get("/history", headers=as_user("frank"))
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+
+    unchanged = backend.get("/history", headers={**as_user("frank"), "If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.get_data() == b""
+    # Someone else's writes leave frank's cached reads valid.
+    add_expense(backend, "grace", 1, "2025-04-04")
+    assert backend.get("/history", headers={**as_user("frank"), "If-None-Match": etag}).status_code == 304
+    # The tag is per user, so it can't revalidate another user's read.
+    assert backend.get("/history", headers={**as_user("grace"), "If-None-Match": etag}).status_code == 200
+
+    add_expense(backend, "frank", 2, "2025-04-04")
+    changed = backend.get("/history", headers={**as_user("frank"), "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert [row["amount"] for row in changed.get_json()["history"]] == [2.0]
+
+
+def test_history_download_streams_only_the_callers_expenses(backend):
+    add_expense(backend, "heidi", 12.5, "2025-04-05")
+    add_expense(backend, "ivan", 3, "2025-04-05")
+    assert backend.get("/history/download").status_code == 401
+
+    response = backend.get("/history/download?format=csv", headers=as_user("heidi"))
+    assert response.status_code == 200
+    assert response.headers["Content-Disposition"] == "attachment; filename=expense_history.csv"
+    rows = response.get_data(as_text=True).splitlines()
+    assert len(rows) == 2
+    assert rows[1].startswith("2025-04-05,groceries,12.5,Food,UPI,")
+    assert backend.get("/history/download?format=xlsx", headers=as_user("heidi")).status_code == 400
+
+
+def test_batch_add_reports_each_row_and_skips_resent_exports(backend):
+    rows = [
+        {"amount": 40, "description": "bus", "category": "Transport", "date": "2025-04-06", "source": "sms"},
+        {"amount": 40, "description": "bus", "category": "Transport", "date": "2025-04-06", "source": "sms"},
+        {"amount": "abc", "description": "bad", "date": "2025-04-06"},
+        {"description": "no amount"},
+    ]
+    first = backend.post("/add_expenses", headers=as_user("judy"), json=rows).get_json()
+    assert [result["status"] for result in first["results"]] == ["ok", "ok", "error", "error"]
+    assert (first["added"], first["duplicates"], first["failed"]) == (2, 0, 2)
+
+    again = backend.post("/add_expenses", headers=as_user("judy"), json=rows[:2]).get_json()
+    assert [result["status"] for result in again["results"]] == ["duplicate", "duplicate"]
+    assert backend.post("/add_expenses", headers=as_user("judy"), json={"amount": 1}).status_code == 400
+
+
+def test_dashboard_is_one_payload_from_the_rollups(backend):
+    add_expense(backend, "mallory", 30, "2025-04-07")
+    add_expense(backend, "mallory", 12, "2025-04-08")
+    backend.post("/set_budget", headers=as_user("mallory"), json={"amount": 100})
+    dashboard = backend.get("/dashboard", headers=as_user("mallory")).get_json()
+    assert dashboard["total_spent"] == 42.0
+    assert dashboard["budget"] == 100
+    assert dashboard["category_totals"] == {"Food": 42.0}
+    assert dashboard["daily_totals"] == {"2025-04-07": 30.0, "2025-04-08": 12.0}
+    assert {"streak", "ai_tip"} <= set(dashboard)
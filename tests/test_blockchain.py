@@ -0,0 +1,161 @@
+import pytest
+
+from blockchain import Blockchain
+from merkle import leaf_hash, merkle_proof, merkle_root, verify_proof
+
+
+def sealed_chain(transactions):
+    chain = Blockchain()
+    chain.difficulty = 1
+    chain.add_transactions(transactions)
+    return chain, chain.get_latest_block()
+
+
+def expenses(count):
+    return [{"expense_id": str(i), "data": f"expense {i}"} for i in range(count)]
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 5, 8])
+def test_every_leaf_has_a_valid_proof(count):
+    leaves = [leaf_hash(transaction) for transaction in expenses(count)]
+    root = merkle_root(leaves)
+    for index, leaf in enumerate(leaves):
+        assert verify_proof(leaf, index, count, merkle_proof(leaves, index), root)
+
+
+def test_rejects_the_padding_copy_of_the_last_leaf():
+    # [a, b, c] and [a, b, c, c] share a root; c is only leaf 2.
+    leaves = [leaf_hash(transaction) for transaction in expenses(3)]
+    root = merkle_root(leaves)
+    padded = leaves + [leaves[-1]]
+    assert merkle_root(padded) == root
+    assert not verify_proof(leaves[2], 3, 3, merkle_proof(padded, 3), root)
+
+
+def test_rejects_steps_on_the_wrong_side():
+    leaves = [leaf_hash(transaction) for transaction in expenses(4)]
+    path = merkle_proof(leaves, 1)
+    path[0]["position"] = "right"
+    assert not verify_proof(leaves[1], 1, 4, path, merkle_root(leaves))
+
+
+def test_inclusion_proof_round_trip():
+    chain, block = sealed_chain(expenses(3))
+    proof = chain.inclusion_proof(block, "2")
+    assert chain.verify_inclusion(proof["transaction"], proof["path"], proof["header"], proof["leaf_index"], proof["block_hash"])
+    assert chain.verify_inclusion(proof["transaction"], proof["path"], proof["header"], proof["leaf_index"])
+
+
+def test_rejects_forged_header():
+    chain, block = sealed_chain(expenses(3))
+    forged = {"expense_id": "99", "data": "never sealed"}
+    header = dict(chain.block_header(block), merkle_root=leaf_hash(forged))
+    assert not chain.verify_inclusion(forged, [], header, 0)
+    assert not chain.verify_inclusion(forged, [], header, 0, chain.hash_block(header))
+
+
+def test_rejects_header_for_unknown_block():
+    chain, block = sealed_chain(expenses(1))
+    header = dict(chain.block_header(block), index=block["index"] + 1)
+    assert not chain.verify_inclusion(expenses(1)[0], [], header, 0)
+
+
+def test_rejects_transaction_not_in_block():
+    chain, block = sealed_chain(expenses(2))
+    proof = chain.inclusion_proof(block, "0")
+    tampered = dict(proof["transaction"], data="edited")
+    assert not chain.verify_inclusion(tampered, proof["path"], proof["header"], proof["leaf_index"], proof["block_hash"])
+
+
+@pytest.fixture
+def store(storage):
+    return storage.chain
+
+
+def shared_chain(store):
+    chain = Blockchain(store=store)
+    chain.difficulty = 1
+    return chain
+
+
+def test_processes_sharing_a_store_extend_each_others_tip(store):
+    first, second = shared_chain(store), shared_chain(store)
+    first.add_transactions(expenses(1))
+    second.add_transactions(expenses(2))
+    first.add_transactions(expenses(3))
+    assert [block["index"] for block in store.latest_blocks(10)] == [1, 2, 3, 4]
+    assert first.is_chain_valid()
+
+
+def test_remines_when_another_process_appends_first(store, monkeypatch):
+    first, second = shared_chain(store), shared_chain(store)
+    stale = second.get_latest_block()
+    first.add_transactions(expenses(1))
+    # The first sync misses that block, as if it landed while this one was mining.
+    syncs = []
+    real_sync = second.sync_tip
+
+    def late_sync():
+        syncs.append(1)
+        if len(syncs) > 1:
+            real_sync()
+
+    monkeypatch.setattr(second, "sync_tip", late_sync)
+    second.add_transactions(expenses(2))
+    assert len(syncs) == 2
+    assert second.get_latest_block()["previous_hash"] != stale["hash"]
+    assert second.get_latest_block()["index"] == 3
+    assert second.is_chain_valid()
+
+
+def test_validation_does_not_wait_for_the_sealing_lock(store):
+    import threading
+
+    chain = shared_chain(store)
+    chain.add_transactions(expenses(2))
+    results = []
+    with chain.lock:
+        worker = threading.Thread(target=lambda: results.append(chain.is_chain_valid()))
+        worker.start()
+        worker.join(timeout=5)
+    assert results == [True]
+
+
+def keyed_chain(store, key):
+    chain = Blockchain(store=store, signing_key=key)
+    chain.difficulty = 1
+    return chain
+
+
+def test_validation_resumes_from_a_signed_checkpoint(store):
+    chain = keyed_chain(store, b"chain-key")
+    chain.add_transactions(expenses(1))
+    assert chain.is_chain_valid()
+    chain.add_transactions(expenses(2))
+    assert chain.is_chain_valid()
+    assert (chain.last_validation["from_index"], chain.last_validation["blocks_checked"]) == (2, 1)
+
+
+def test_checkpoints_signed_with_another_key_are_ignored(store):
+    keyed_chain(store, b"guessed").add_transactions(expenses(1))
+    forger = keyed_chain(store, b"guessed")
+    assert forger.is_chain_valid()
+
+    chain = keyed_chain(store, b"chain-key")
+    assert chain.trusted_checkpoint() is None
+    assert chain.is_chain_valid()
+    assert chain.last_validation["from_index"] == 1
+
+
+def test_without_a_key_checkpoints_are_neither_written_nor_trusted(store):
+    keyed = keyed_chain(store, b"chain-key")
+    keyed.add_transactions(expenses(1))
+    assert keyed.is_chain_valid()
+    chain = keyed_chain(store, None)
+    chain.add_transactions(expenses(2))
+    assert chain.trusted_checkpoint() is None
+    assert chain.is_chain_valid()
+    assert chain.last_validation["from_index"] == 1
+    assert store.latest_checkpoint()["index"] == 2
+    with pytest.raises(ValueError):
+        chain.sign_checkpoint(2, "hash")
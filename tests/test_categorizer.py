@@ -0,0 +1,49 @@
+import records
+import rollups
+from categorizer import CategoryEngine
+
+
+def engine_for(storage):
+    engine = CategoryEngine(storage, refresh_interval=0)
+    engine.seed_defaults()
+    return engine
+
+
+def test_categorizes_by_best_rule(storage):
+    engine = engine_for(storage)
+    assert engine.categorize("Paid to Zomato lunch") == "Food"
+    assert engine.categorize("Paid to Rohit for movie") == "Personal"
+    assert engine.categorize("Paid to someone new") == "Others"
+
+
+def test_canonical_spelling_ignores_case(storage):
+    engine = engine_for(storage)
+    assert engine.canonical("food") == "Food"
+    assert engine.canonical(" TRANSPORT ") == "Transport"
+    assert engine.canonical("others") == "Others"
+    # The old fallback spelling the add routes used to store.
+    assert engine.canonical("other") == "Others"
+    assert engine.canonical("Groceries") == "Groceries"
+
+
+def test_new_rules_reuse_existing_spelling(storage):
+    engine = engine_for(storage)
+    engine.add_rules([{"pattern": "swiggy", "category": "food"}])
+    assert engine.categorize("Paid to Swiggy") == "Food"
+
+
+def test_normalize_stored_merges_lower_case_rows(storage):
+    engine = engine_for(storage)
+    expenses = [
+        records.normalize_expense({"user_id": "alice", "amount": amount, "description": "x", "category": category,
+                                   "transaction_type": "UPI", "date": "2025-03-01"})
+        for amount, category in (("10", "food"), ("20", "Food"), ("5", "transport"), ("7", "Groceries"))
+    ]
+    storage.insert_expenses(expenses)
+    rollups.rebuild(storage)
+    assert rollups.read_totals(storage, "alice", "category")["food"] == 10.0
+
+    assert engine.normalize_stored() == {"food": "Food", "transport": "Transport"}
+    rollups.rebuild(storage)
+    assert rollups.read_totals(storage, "alice", "category") == {"Food": 30.0, "Groceries": 7.0, "Transport": 5.0}
+    assert engine.normalize_stored() == {}
@@ -0,0 +1,55 @@
+import os
+import pickle
+
+import records
+from classifier import CategoryClassifier
+
+
+def add_labelled(storage, user_id, rows, copies=20):
+    storage.insert_expenses([
+        records.normalize_expense({"user_id": user_id, "amount": "10", "description": description, "category": category,
+                                   "category_source": "user", "transaction_type": "UPI", "date": "2025-03-01"})
+        for description, category in rows
+        for _ in range(copies)
+    ])
+
+
+def classifier_for(storage, tmp_path):
+    return CategoryClassifier(storage, model_path=str(tmp_path / "category_model.pkl"), min_confidence=0.0)
+
+
+def test_each_user_gets_suggestions_from_their_own_expenses(storage, tmp_path):
+    add_labelled(storage, "alice", [("acme pharmacy", "Health"), ("metro recharge", "Transport")])
+    add_labelled(storage, "bob", [("acme pharmacy", "Secret Project"), ("bakery", "Food")])
+    classifier = classifier_for(storage, tmp_path)
+    assert classifier.train() == 80
+
+    assert classifier.predict_many(["acme pharmacy"], "alice") == ["Health"]
+    assert classifier.predict_many(["acme pharmacy"], "bob") == ["Secret Project"]
+    # A user without a model of their own gets no suggestion at all.
+    assert classifier.predict_many(["acme pharmacy"], "carol") == [None]
+    assert classifier.stats()["users"] == 2
+
+
+def test_models_survive_a_restart(storage, tmp_path):
+    add_labelled(storage, "alice", [("acme pharmacy", "Health"), ("metro recharge", "Transport")])
+    classifier_for(storage, tmp_path).train()
+    assert os.stat(tmp_path / "category_model.pkl").st_mode & 0o077 == 0
+
+    restarted = classifier_for(storage, tmp_path)
+    assert restarted.load()
+    assert restarted.predict_many(["metro recharge"], "alice") == ["Transport"]
+
+
+def test_refuses_shared_or_writable_model_files(storage, tmp_path):
+    path = tmp_path / "category_model.pkl"
+    # The old format: one model fitted on every user's expenses.
+    with open(path, "wb") as model_file:
+        pickle.dump({"model": None, "classes": [], "version": 1}, model_file)
+    os.chmod(path, 0o600)
+    assert not classifier_for(storage, tmp_path).load()
+
+    add_labelled(storage, "alice", [("acme pharmacy", "Health"), ("metro recharge", "Transport")])
+    classifier_for(storage, tmp_path).train()
+    os.chmod(path, 0o666)
+    assert not classifier_for(storage, tmp_path).load()
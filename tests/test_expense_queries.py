@@ -0,0 +1,87 @@
+import pytest
+
+import expense_queries
+import records
+
+
+def add_expenses(storage, rows, user_id="alice"):
+    expenses = [
+        records.normalize_expense({
+            "user_id": user_id,
+            "amount": amount,
+            "description": f"expense {index}",
+            "category": category,
+            "transaction_type": "UPI",
+            "date": date,
+            "created_at": f"{date} 10:00:00",
+            "block_hash": "pending",
+        })
+        for index, (date, amount, category) in enumerate(rows)
+    ]
+    storage.insert_expenses(expenses)
+
+
+def all_pages(storage, args, user_id="alice"):
+    pages = []
+    cursor = None
+    while True:
+        page_args = dict(args, cursor=cursor) if cursor else dict(args)
+        expenses, cursor = expense_queries.fetch_page(storage, page_args, user_id)
+        pages.append(expenses)
+        if cursor is None:
+            return pages
+
+
+# Several rows share a date, so the cursor has to break ties on id.
+ROWS = [
+    ("2025-03-01", "10", "Food"),
+    ("2025-03-02", "20", "Transport"),
+    ("2025-03-02", "30", "Food"),
+    ("2025-03-02", "40", "Food"),
+    ("2025-03-03", "50", "Bills"),
+    ("2025-03-04", "60", "Food"),
+    ("2025-03-04", "70", "Transport"),
+]
+
+
+def test_pages_cover_every_row_once_newest_first(storage):
+    add_expenses(storage, ROWS)
+    pages = all_pages(storage, {"limit": "2"})
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+    rows = [expense for page in pages for expense in page]
+    assert len({expense["id"] for expense in rows}) == len(ROWS)
+    keys = [(expense["date"], int(expense["id"])) for expense in rows]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_last_full_page_has_no_cursor(storage):
+    add_expenses(storage, ROWS[:4])
+    expenses, cursor = expense_queries.fetch_page(storage, {"limit": "4"}, "alice")
+    assert len(expenses) == 4
+    assert cursor is None
+
+
+def test_cursor_carries_filters(storage):
+    add_expenses(storage, ROWS)
+    pages = all_pages(storage, {"limit": "1", "category": "Food", "min_amount": "20"})
+    assert [expense["amount"] for page in pages for expense in page] == [60.0, 40.0, 30.0]
+
+
+def test_cursor_round_trip(storage):
+    add_expenses(storage, ROWS[:1])
+    document = next(iter(storage.find_expenses({}, ("date",))))
+    cursor = expense_queries.encode_cursor(document)
+    assert expense_queries.decode_cursor(cursor, storage.parse_id) == (document["date"], document["_id"])
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", "eyJkYXRlIjoieCIsImlkIjoiMSJ9"])
+def test_rejects_malformed_cursor(storage, cursor):
+    with pytest.raises(expense_queries.QueryError):
+        expense_queries.fetch_page(storage, {"cursor": cursor}, "alice")
+
+
+def test_pages_only_hold_the_callers_rows(storage):
+    add_expenses(storage, ROWS)
+    add_expenses(storage, ROWS, user_id="bob")
+    rows = [expense for page in all_pages(storage, {"limit": "3"}) for expense in page]
+    assert len(rows) == len(ROWS)
@@ -0,0 +1,53 @@
+import csv
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import exports
+import records
+
+
+def documents(count):
+    for number in range(count):
+        yield records.serialize_expense({
+            "date": f"2025-03-{number % 28 + 1:02d}", "description": f"item {number}", "amount_paise": 100 + number,
+            "category": "Food", "transaction_type": "UPI", "created_at": "2025-03-01 09:00:00",
+            **({} if number % 2 else {"block_hash": "abc"})
+        })
+
+
+def test_csv_is_streamed_a_chunk_at_a_time():
+    consumed = []
+    source = (consumed.append(document) or document for document in documents(5))
+    chunks = exports.iter_csv(source, chunk_rows=2)
+    first = next(chunks)
+    # Only the first chunk has been read from the cursor.
+    assert len(consumed) == 2
+    rows = list(csv.reader(io.StringIO((first + b"".join(chunks)).decode())))
+    assert rows[0] == [title for _field, title in exports.EXPORT_COLUMNS]
+    assert len(rows) == 6
+    assert rows[1] == ["2025-03-01", "item 0", "1.0", "Food", "UPI", "2025-03-01 09:00:00", "abc"]
+    # Expenses not yet sealed into a block.
+    assert rows[2][-1] == "N/A"
+
+
+def test_csv_of_nothing_is_just_the_header():
+    assert b"".join(exports.iter_csv([])).decode().splitlines() == ["Date,Description,Amount,Category,Transaction Type,Created At,Block Hash"]
+
+
+def test_parquet_export_reads_back():
+    body = b"".join(exports.iter_columnar(documents(25), "parquet", chunk_rows=10))
+    table = pq.read_table(pa.BufferReader(body))
+    assert table.num_rows == 25
+    assert pq.ParquetFile(pa.BufferReader(body)).metadata.num_row_groups == 3
+    assert table.column("amount").to_pylist()[:2] == [1.0, 1.01]
+    assert table.column("block_hash").to_pylist()[:2] == ["abc", None]
+
+
+def test_arrow_stream_export_reads_back():
+    parts = list(exports.iter_columnar(documents(25), "arrow", chunk_rows=10))
+    assert len(parts) > 1
+    table = pa.ipc.open_stream(b"".join(parts)).read_all()
+    assert table.column_names == [field for field, _title in exports.EXPORT_COLUMNS]
+    assert table.column("description").to_pylist()[-1] == "item 24"
@@ -0,0 +1,64 @@
+import records
+from fingerprints import TransactionFingerprinter, file_fingerprint, normalize_description
+
+
+def statement_rows(*rows):
+    return [
+        records.normalize_expense({"user_id": "alice", "date": date, "amount": amount, "description": description,
+                                   "category": "Food", "transaction_type": "Card"})
+        for date, amount, description in rows
+    ]
+
+
+def fingerprint_all(rows, source="statement"):
+    fingerprinter = TransactionFingerprinter(source)
+    for row in rows:
+        row["fingerprint"] = fingerprinter.fingerprint(row)
+    return [row["fingerprint"] for row in rows]
+
+
+FEBRUARY = [("2025-02-27", "30", "Paid to ROHIT"), ("2025-02-28", "15", "Paid to Zomato"), ("2025-02-28", "15", "Paid to Zomato")]
+MARCH = [("2025-02-28", "15", "Paid to Zomato"), ("2025-02-28", "15", "Paid to Zomato"), ("2025-03-01", "20", "Paid to Preeti")]
+
+
+def test_repeated_rows_in_one_import_are_distinct():
+    prints = fingerprint_all(statement_rows(*FEBRUARY))
+    assert len(set(prints)) == 3
+
+
+def test_overlapping_statements_reproduce_fingerprints():
+    february = fingerprint_all(statement_rows(*FEBRUARY))
+    march = fingerprint_all(statement_rows(*MARCH))
+    assert march[:2] == february[1:]
+    assert march[2] not in february
+
+
+def test_ocr_noise_in_descriptions_is_ignored():
+    assert normalize_description("Paid to  ZOMATO,") == normalize_description("paid to zomato")
+    clean = fingerprint_all(statement_rows(("2025-02-28", "15", "Paid to Zomato")))
+    noisy = fingerprint_all(statement_rows(("2025-02-28", "15.00", "Paid  to ZOMATO.")))
+    assert clean == noisy
+
+
+def test_sources_do_not_collide():
+    rows = [("2025-02-28", "15", "Paid to Zomato")]
+    assert fingerprint_all(statement_rows(*rows), "statement") != fingerprint_all(statement_rows(*rows), "sms")
+
+
+def test_storage_skips_rows_already_imported(storage):
+    february = statement_rows(*FEBRUARY)
+    fingerprint_all(february)
+    assert storage.insert_expenses(february) == set()
+
+    march = statement_rows(*MARCH)
+    fingerprint_all(march)
+    assert storage.insert_expenses(march) == {0, 1}
+    assert len(list(storage.find_expenses({"user_id": "alice"}))) == 4
+
+
+def test_file_fingerprint_depends_on_content(tmp_path):
+    first, second, third = tmp_path / "a.pdf", tmp_path / "b.pdf", tmp_path / "c.pdf"
+    first.write_bytes(b"%PDF-1.4 statement")
+    second.write_bytes(b"%PDF-1.4 statement")
+    third.write_bytes(b"%PDF-1.4 other")
+    assert file_fingerprint(str(first)) == file_fingerprint(str(second)) != file_fingerprint(str(third))
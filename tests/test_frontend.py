@@ -0,0 +1,125 @@
+import io
+
+import pytest
+
+import flask_app
+import identity
+
+SECRET = b"shared-with-the-backend"
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self.payload
+
+
+def job(status, **fields):
+    return {"job_id": "abc", "filename": "statement.pdf", "status": status, "pages_done": 1, "pages_total": 4,
+            "transactions": 7, "duplicates": 0, "errors": [], **fields}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(flask_app, "USER_AUTH_SECRET", SECRET)
+    flask_app.app.config["TESTING"] = True
+    with flask_app.app.test_client() as client:
+        with client.session_transaction() as session:
+            session["user_id"] = "user1"
+        yield client
+
+
+def serve_job(monkeypatch, payload, status_code=200):
+    calls = []
+
+    def fake_get(url, headers=None, **kwargs):
+        calls.append((url, headers))
+        return FakeResponse(payload, status_code)
+
+    monkeypatch.setattr(flask_app.backend, "get", fake_get)
+    return calls
+
+
+def test_progress_page_refreshes_while_the_job_runs(client, monkeypatch):
+    calls = serve_job(monkeypatch, job("running"))
+    response = client.get("/upload/jobs/abc")
+    page = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert 'http-equiv="refresh"' in page
+    assert "1 / 4" in page
+    [(url, headers)] = calls
+    assert url == f"{flask_app.BACKEND_URL}/jobs/abc"
+    assert identity.verify(SECRET, headers, max_age=60) == "user1"
+
+
+def test_progress_page_stops_refreshing_when_done(client, monkeypatch):
+    serve_job(monkeypatch, job("done", pages_done=4, errors=["Page 2: could not parse x"]))
+    page = client.get("/upload/jobs/abc").get_data(as_text=True)
+    assert 'http-equiv="refresh"' not in page
+    assert "Page 2: could not parse x" in page
+    assert "/history" in page
+
+
+def test_progress_page_for_unknown_job(client, monkeypatch):
+    serve_job(monkeypatch, {"detail": "Job not found."}, 404)
+    response = client.get("/upload/jobs/missing")
+    assert response.status_code == 404
+    assert "Job not found." in response.get_data(as_text=True)
+
+
+def test_upload_redirects_to_progress(client, monkeypatch):
+    class Queued(FakeResponse):
+        def raise_for_status(self):
+            pass
+
+    monkeypatch.setattr(flask_app.backend, "post", lambda *args, **kwargs: Queued({"job_id": "abc", "message": "queued"}, 202))
+    response = client.post("/upload", data={"file": (io.BytesIO(b"%PDF"), "statement.pdf")})
+    assert response.status_code == 302
+    assert response.headers["Location"].endswith("/upload/jobs/abc")
+
+
+class CachedResponse(FakeResponse):
+    def __init__(self, payload, status_code=200, etag=None):
+        super().__init__(payload, status_code)
+        self.headers = {"ETag": etag} if etag else {}
+        self.content = repr(payload).encode()
+
+    def raise_for_status(self):
+        pass
+
+
+def test_backend_reads_are_revalidated_against_the_cache(monkeypatch):
+    monkeypatch.setattr(flask_app, "response_cache", flask_app.ResponseCache(1024))
+    replies = [CachedResponse({"total": 1}, etag='"v1"'), CachedResponse(None, 304), CachedResponse({"total": 2}, etag='"v2"')]
+    sent = []
+
+    def fake_get(url, headers=None, **kwargs):
+        sent.append(headers.get("If-None-Match"))
+        return replies.pop(0)
+
+    monkeypatch.setattr(flask_app.backend, "get", fake_get)
+    assert flask_app.backend_get_json("/dashboard", "user1") == {"total": 1}
+    assert flask_app.backend_get_json("/dashboard", "user1") == {"total": 1}
+    # A new tag from the backend replaces the cached payload.
+    assert flask_app.backend_get_json("/dashboard", "user1") == {"total": 2}
+    assert sent == [None, '"v1"', '"v1"']
+    assert (flask_app.response_cache.hits, flask_app.response_cache.misses) == (1, 2)
+    assert flask_app.response_cache.get(("user1", "/dashboard", ()))[0] == '"v2"'
+
+
+def test_response_cache_evicts_least_recently_used_within_its_budget():
+    cache = flask_app.ResponseCache(max_bytes=10)
+    cache.put("a", "1", {"a": 1}, 4)
+    cache.put("b", "1", {"b": 1}, 4)
+    cache.get("a")
+    cache.put("c", "1", {"c": 1}, 4)
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.size == 8
+    cache.put("a", "2", {"a": 2}, 7)
+    assert list(cache.entries) == ["a"]
+    assert cache.size == 7
+    cache.put("huge", "1", {}, 11)
+    assert "huge" not in cache.entries
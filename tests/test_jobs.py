@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+
+from jobs import JobManager, JobQueueFull
+
+
+class Upload:
+    def save(self, spool_file):
+        spool_file.write(b"%PDF")
+
+
+def wait_for(manager, job_id, status):
+    for _ in range(200):
+        job = manager.get(job_id)
+        if job["status"] == status:
+            return job
+        threading.Event().wait(0.01)
+    raise AssertionError(f"job stayed {job['status']}")
+
+
+def test_recover_fails_jobs_cut_off_by_a_restart(storage, tmp_path):
+    release = threading.Event()
+    before = JobManager(storage, {"statement": lambda path, progress: release.wait(5)}, workers=1, spool_dir=str(tmp_path))
+    running = before.submit("statement", before.spool(Upload()), user_id="alice")
+    queued = before.submit("statement", before.spool(Upload()), user_id="alice")
+    wait_for(before, running["job_id"], "running")
+
+    # A new process sees the jobs the old one never finished.
+    after = JobManager(storage, {}, spool_dir=str(tmp_path))
+    assert after.recover() == 2
+    for job_id in (running["job_id"], queued["job_id"]):
+        job = after.get(job_id)
+        assert job["status"] == "failed"
+        assert job["errors"] == ["Interrupted by a server restart."]
+        assert job["finished_at"]
+    assert after.recover() == 0
+    release.set()
+    wait_for(before, queued["job_id"], "done")
+    before.shutdown()
+
+
+def test_jobs_report_progress_and_clean_up_their_spool(storage, tmp_path):
+    def handler(path, progress):
+        progress.update(pages_total=2, pages_done=2)
+        progress.error("Page 2: could not parse")
+        return {"inserted": 3}
+
+    manager = JobManager(storage, {"statement": handler}, spool_dir=str(tmp_path / "spool"))
+    job = wait_for(manager, manager.submit("statement", manager.spool(Upload()), "s.pdf", "alice")["job_id"], "done")
+    assert (job["pages_done"], job["result"], job["errors"], job["user_id"]) == (2, {"inserted": 3}, ["Page 2: could not parse"], "alice")
+    assert list((tmp_path / "spool").iterdir()) == []
+    manager.shutdown()
+
+
+def test_submit_refuses_work_beyond_the_queue(storage, tmp_path):
+    release = threading.Event()
+    manager = JobManager(storage, {"statement": lambda path, progress: release.wait(5)}, workers=1, max_queued=1, spool_dir=str(tmp_path / "spool"))
+    accepted = [manager.submit("statement", manager.spool(Upload())) for _ in range(2)]
+    with pytest.raises(JobQueueFull):
+        manager.submit("statement", manager.spool(Upload()))
+    assert len(list((tmp_path / "spool").iterdir())) == 2
+    release.set()
+    for job in accepted:
+        wait_for(manager, job["job_id"], "done")
+    manager.shutdown()
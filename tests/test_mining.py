@@ -0,0 +1,32 @@
+import hashlib
+
+import pytest
+
+from blockchain import Blockchain
+from mining import MiningEngine, legacy_proof_of_work, meets_difficulty
+
+
+@pytest.mark.parametrize("difficulty", [1, 2, 3])
+def test_byte_check_matches_the_hex_prefix_check(difficulty):
+    for value in range(2000):
+        digest = hashlib.sha256(str(value).encode())
+        assert meets_difficulty(digest.digest(), difficulty) == digest.hexdigest().startswith("0" * difficulty)
+
+
+def test_single_worker_finds_the_legacy_proof():
+    engine = MiningEngine(workers=1, batch=64)
+    for previous_proof in (1, 533, 98765):
+        assert engine.mine(previous_proof, 3) == legacy_proof_of_work(previous_proof, 3)
+
+
+def test_worker_pool_mines_blocks_that_validate():
+    engine = MiningEngine(workers=2, batch=256)
+    try:
+        chain = Blockchain(miner=engine)
+        chain.difficulty = 3
+        chain.add_transactions([{"expense_id": "1", "data": "tea"}])
+        chain.add_transactions([{"expense_id": "2", "data": "bus"}])
+        assert chain.is_chain_valid()
+        assert engine.last_attempts > 0
+    finally:
+        engine.shutdown()
@@ -0,0 +1,56 @@
+import json
+import logging
+
+from flask import Flask
+
+import observability
+
+
+def record(msg, *args, name="expense_tracker.test", **fields):
+    entry = logging.LogRecord(name, logging.INFO, __file__, 1, msg, args, None)
+    entry.fields = fields
+    return entry
+
+
+def test_log_lines_are_json_with_structured_fields():
+    line = json.loads(observability.JSONFormatter().format(record("Expense added", expense_id=7, amount=1.5)))
+    assert (line["level"], line["logger"], line["event"]) == ("info", "expense_tracker.test", "Expense added")
+    assert (line["expense_id"], line["amount"]) == (7, 1.5)
+
+
+def test_repeated_messages_are_rate_limited_and_counted():
+    limiter = observability.RateLimitFilter(rate=0, burst=2)
+    passed = [limiter.filter(record("Page %d unreadable", page)) for page in range(5)]
+    assert passed == [True, True, False, False, False]
+    # A different message has its own budget.
+    assert limiter.filter(record("Another event"))
+
+    limiter.rate = 1e9
+    released = record("Page %d unreadable", 6)
+    assert limiter.filter(released)
+    assert released.suppressed == 3
+
+
+def test_histogram_renders_cumulative_prometheus_buckets():
+    histogram = observability.Histogram("demo_seconds", "Demo.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 5.0):
+        histogram.observe(value, stage="ocr")
+    lines = histogram.render().splitlines()
+    assert 'demo_seconds_bucket{stage="ocr",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{stage="ocr",le="1.0"} 3' in lines
+    assert 'demo_seconds_bucket{stage="ocr",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{stage="ocr"} 4' in lines
+
+
+def test_instrumented_apps_time_requests_by_route():
+    app = Flask(__name__)
+    observability.instrument(app, "demo")
+
+    @app.route("/items/<item_id>")
+    def item(item_id):
+        return item_id
+
+    client = app.test_client()
+    client.get("/items/42")
+    metrics = client.get("/metrics").get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{app="demo",method="GET",endpoint="/items/<item_id>",status="200"} 1' in metrics
@@ -0,0 +1,51 @@
+import sqlite3
+
+from ocr_cache import OCRPageCache
+
+
+def stored_bytes(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_pages").fetchone()[0]
+
+
+def test_running_total_tracks_puts_and_replacements(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = OCRPageCache(path, max_bytes=1000)
+    cache.put("a", "x" * 100)
+    cache.put("b", "y" * 50)
+    cache.put("a", "z" * 10)
+    assert cache.usage()["entries"] == 2
+    assert cache.usage()["bytes"] == stored_bytes(path) == 60
+    assert cache.get("a") == "z" * 10
+
+
+def test_evicts_least_recently_used_past_the_limit(tmp_path):
+    cache = OCRPageCache(str(tmp_path / "cache.db"), max_bytes=250)
+    for key in "abc":
+        cache.put(key, key * 100)
+    assert cache.get("a") is None
+    assert cache.get("b") == "b" * 100
+    cache.put("d", "d" * 100)
+    assert cache.get("c") is None
+    assert cache.get("b") == "b" * 100
+    assert cache.evictions == 2
+    assert cache.usage()["bytes"] == 200
+
+
+def test_processes_sharing_the_file_share_the_total(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first, second = OCRPageCache(path, max_bytes=150), OCRPageCache(path, max_bytes=150)
+    first.put("a", "a" * 100)
+    second.put("b", "b" * 100)
+    assert first.usage()["bytes"] == second.usage()["bytes"] == 100
+    assert first.get("a") is None
+
+
+def test_existing_cache_files_are_counted_on_open(tmp_path):
+    path = str(tmp_path / "cache.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE ocr_pages (key TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)")
+        conn.execute("INSERT INTO ocr_pages VALUES ('old', 'text', 4, 0)")
+    cache = OCRPageCache(path)
+    assert cache.usage()["entries"] == 1
+    assert cache.usage()["bytes"] == 4
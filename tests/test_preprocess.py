@@ -0,0 +1,39 @@
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+import preprocess
+
+DESKEW_ONLY = {"grayscale": True, "deskew": True, "max_skew": 5.0}
+
+
+def statement_page():
+    page = np.full((800, 600), 255, np.uint8)
+    for row in range(20):
+        cv2.putText(page, "Paid to ZOMATO 2025 DEBIT 1234", (40, 60 + row * 35), cv2.FONT_HERSHEY_SIMPLEX, 0.7, 0, 2)
+    return page
+
+
+def test_straight_page_has_no_skew():
+    assert abs(preprocess.estimate_skew(statement_page())) < 0.1
+
+
+@pytest.mark.parametrize("angle", [3.0, -3.0, 1.5, -1.5, 4.5, -4.5])
+def test_skew_is_measured_in_both_directions(angle):
+    skewed = preprocess.rotate(statement_page(), angle)
+    assert preprocess.estimate_skew(skewed) == pytest.approx(-angle, abs=0.3)
+
+
+@pytest.mark.parametrize("angle", [3.0, -3.0])
+def test_preprocess_straightens_both_directions(angle):
+    skewed = Image.fromarray(preprocess.rotate(statement_page(), angle))
+    pixels, info = preprocess.preprocess(skewed, DESKEW_ONLY)
+    assert info["skew"] == pytest.approx(-angle, abs=0.3)
+    assert abs(preprocess.estimate_skew(pixels)) < 0.3
+
+
+def test_skew_past_the_limit_is_left_alone():
+    skewed = Image.fromarray(preprocess.rotate(statement_page(), -8.0))
+    _pixels, info = preprocess.preprocess(skewed, DESKEW_ONLY)
+    assert "skew" not in info
@@ -0,0 +1,34 @@
+from datetime import date, datetime
+
+import pytest
+
+import records
+
+
+@pytest.mark.parametrize("value, paise", [
+    ("12.50", 1250), (12.5, 1250), ("₹1,299.99", 129999), (0.1 + 0.2, 30), (7, 700), ("-3", -300),
+])
+def test_amounts_are_stored_as_exact_paise(value, paise):
+    assert records.to_paise(value) == paise
+
+
+@pytest.mark.parametrize("value", ["abc", "", "nan", "inf", True, None])
+def test_bad_amounts_are_rejected(value):
+    with pytest.raises(ValueError):
+        records.to_paise(value)
+
+
+def test_dates_are_stored_as_midnight():
+    assert records.to_date("2025-03-04") == datetime(2025, 3, 4)
+    assert records.to_date("2025-03-04 18:30:00") == datetime(2025, 3, 4)
+    assert records.to_date(date(2025, 3, 4)) == records.to_date(datetime(2025, 3, 4, 18, 30))
+    with pytest.raises(ValueError):
+        records.to_date("04/03/2025")
+
+
+def test_api_form_round_trips():
+    stored = records.normalize_expense({"amount": "99.90", "date": "2025-03-04", "created_at": "2025-03-04 09:30:00"})
+    assert stored == {"amount_paise": 9990, "date": datetime(2025, 3, 4), "created_at": datetime(2025, 3, 4, 9, 30)}
+    assert records.serialize_expense(stored) == {"amount": 99.9, "date": "2025-03-04", "created_at": "2025-03-04 09:30:00"}
+    # Rows from before the migration still read back.
+    assert records.serialize_expense({"amount": "5", "date": "2025-03-04"}) == {"amount": 5.0, "date": "2025-03-04"}
@@ -0,0 +1,34 @@
+import records
+import rollups
+
+
+def expense(user_id, amount, date, category="Food"):
+    return records.normalize_expense({"user_id": user_id, "amount": amount, "description": category, "category": category,
+                                      "transaction_type": "UPI", "date": date})
+
+
+def test_writes_upsert_every_rollup(storage):
+    rollups.apply_expenses(storage, [expense("alice", "10", "2025-03-01"), expense("alice", "2.50", "2025-03-02", "Transport")])
+    rollups.apply_expenses(storage, [expense("alice", "5", "2025-03-01"), expense("bob", "99", "2025-03-01")])
+    assert rollups.read_totals(storage, "alice", "day") == {"2025-03-01": 15.0, "2025-03-02": 2.5}
+    assert rollups.read_totals(storage, "alice", "month") == {"2025-03": 17.5}
+    assert rollups.read_totals(storage, "alice", "category") == {"Food": 15.0, "Transport": 2.5}
+    assert rollups.read_totals(storage, "bob", "day") == {"2025-03-01": 99.0}
+
+
+def test_deletes_decrement_and_drop_empty_rollups(storage):
+    kept, deleted = expense("alice", "10", "2025-03-01"), expense("alice", "4", "2025-03-02", "Transport")
+    rollups.apply_expenses(storage, [kept, deleted])
+    rollups.remove_expenses(storage, [deleted])
+    assert rollups.read_totals(storage, "alice", "day") == {"2025-03-01": 10.0}
+    assert rollups.read_totals(storage, "alice", "month") == {"2025-03": 10.0}
+    assert rollups.read_totals(storage, "alice", "category") == {"Food": 10.0}
+
+
+def test_rebuild_matches_the_stored_expenses(storage):
+    storage.insert_expenses([expense("alice", "10", "2025-03-01"), expense("alice", "1", "2025-04-01", "Transport")])
+    # Stale totals, e.g. from writes made before rollups were maintained.
+    rollups.apply_expenses(storage, [expense("alice", "500", "2025-01-01")])
+    rollups.rebuild(storage)
+    assert rollups.read_totals(storage, "alice", "month") == {"2025-03": 10.0, "2025-04": 1.0}
+    assert rollups.read_totals(storage, "alice", "category") == {"Food": 10.0, "Transport": 1.0}
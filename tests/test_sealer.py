@@ -0,0 +1,55 @@
+import threading
+
+from blockchain import Blockchain
+from sealer import BlockSealer
+
+
+def transactions(count, prefix="t"):
+    return [{"expense_id": f"{prefix}{number}", "data": f"expense {number}"} for number in range(count)]
+
+
+def recording_sealer(**kwargs):
+    chain = Blockchain()
+    chain.difficulty = 1
+    sealed = []
+    return BlockSealer(chain, lambda block, batch, user_id: sealed.append((block, batch, user_id)), **kwargs), sealed
+
+
+def test_submit_returns_before_anything_is_mined():
+    sealer, sealed = recording_sealer()
+    receipt = sealer.submit(transactions(1)[0], "alice")
+    assert receipt["status"] == "pending" and receipt["queued"] == 1
+    assert sealed == []
+    assert sealer.stats()["pending"] == 1
+
+
+def test_blocks_hold_one_users_groups_in_order_without_splitting_them():
+    sealer, sealed = recording_sealer(max_block_size=3)
+    sealer.submit_many(transactions(2, "a"), "alice")
+    sealer.submit_many(transactions(1, "b"), "bob")
+    sealer.submit_many(transactions(2, "c"), "alice")
+    sealer.submit_many(transactions(1, "d"), "alice")
+    sealer.flush()
+    assert [(user_id, [t["expense_id"] for t in batch]) for _block, batch, user_id in sealed] == [
+        # c doesn't fit beside a, and d isn't sealed ahead of it.
+        ("alice", ["a0", "a1"]),
+        ("bob", ["b0"]),
+        ("alice", ["c0", "c1", "d0"]),
+    ]
+    assert all(block["user_id"] == user_id for block, _batch, user_id in sealed)
+    assert sealer.stats()["blocks_sealed"] == 3
+    assert sealer.blockchain.is_chain_valid()
+
+
+def test_worker_seals_a_partial_block_after_max_wait():
+    chain = Blockchain()
+    chain.difficulty = 1
+    done = threading.Event()
+    sealer = BlockSealer(chain, lambda block, batch, user_id: done.set(), max_block_size=100, max_wait=0.05)
+    sealer.start()
+    try:
+        sealer.submit_many(transactions(2), "alice")
+        assert done.wait(5)
+        assert chain.get_latest_block()["index"] == 2
+    finally:
+        sealer.stop()
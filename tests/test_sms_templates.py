@@ -0,0 +1,56 @@
+import pytest
+
+import sms_templates
+
+MESSAGES = [
+    ("legacy", "Debited INR 250.00 for groceries on 2025-03-04", "2025-03-04"),
+    ("hdfc_card", "Spent Rs.1,299.50 On HDFC Bank Card x1234 At AMAZON On 2025-03-05", "2025-03-05"),
+    ("hdfc_upi", "Sent Rs.150.00 From HDFC Bank A/C *5678 To Chai Point On 06/03/25 Ref 512345678901", "2025-03-06"),
+    ("sbi_upi", "Dear UPI user A/C X9012 debited by 75.0 on date 07Mar25 trf to RAMESH Refno 512300001111", "2025-03-07"),
+    ("icici", "ICICI Bank Acct XX345 debited for Rs 420.00 on 08-Mar-25; SWIGGY credited. UPI:512300002222", "2025-03-08"),
+    ("axis_upi", "INR 60.00 debited A/c no. XX4321 09-03-25, 10:15:01 UPI/P2M/512300003333/METRO CARD Not you?", "2025-03-09"),
+    ("kotak_upi", "Sent Rs.99.00 from Kotak Bank AC X8765 to zomato@upi on 10-03-25.UPI Ref 512300004444", "2025-03-10"),
+    ("card_spend", "INR 899.00 spent on your SBI Card XX1111 at BIGBASKET on 11-Mar-25", "2025-03-11"),
+]
+
+
+@pytest.mark.parametrize("name, message, date", MESSAGES)
+def test_each_template_parses_its_format(name, message, date):
+    template, parsed = sms_templates.parse_message(message)
+    assert template.name == name
+    assert parsed["expense"]["date"] == date
+    assert float(parsed["expense"]["amount"]) > 0
+    assert parsed["expense"]["description"]
+
+
+def test_every_registered_template_is_covered():
+    assert {name for name, _message, _date in MESSAGES} | {"paytm", "phonepe"} == {template.name for template in sms_templates.TEMPLATES}
+
+
+def test_import_dedupes_and_counts_hits():
+    lines = [message for _name, message, _date in MESSAGES]
+    lines += [MESSAGES[2][1], "", "Your OTP is 123456"]
+    stats = sms_templates.SMSImportStats()
+    expenses = list(sms_templates.iter_sms_expenses(lines, stats))
+    report = stats.report()
+    assert len(expenses) == len(MESSAGES)
+    assert (report["lines"], report["matched"], report["duplicates"], report["unmatched"]) == (10, 8, 1, 1)
+    assert report["templates"]["hdfc_upi"]["hits"] == 1
+
+
+def test_undated_lines_are_rejected_not_forwarded():
+    lines = [
+        # Paytm alerts carry no date at all.
+        "Paid Rs.120 to Tea Stall from Paytm Balance. Txn ID: 998877",
+        # Matches the legacy template, but the month is not a real one.
+        "Debited INR 40 for bus on 2025-13-02",
+        MESSAGES[0][1],
+    ]
+    stats = sms_templates.SMSImportStats()
+    expenses = list(sms_templates.iter_sms_expenses(lines, stats))
+    report = stats.report()
+    assert [expense["date"] for expense in expenses] == ["2025-03-04"]
+    assert report["undated"] == 2
+    assert report["matched"] == 1
+    assert report["templates"]["paytm"] == {"hits": 0, "undated": 1, "hit_rate": 0.0}
+    assert report["templates"]["legacy"]["undated"] == 1
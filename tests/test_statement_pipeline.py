@@ -0,0 +1,131 @@
+import os
+import time
+
+import pytest
+
+import statement_pipeline
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES = [
+    ("PhonePe_Statement_Feb2025_Apr2025.pdf", 4, 25),
+    ("PhonePe_Statement_Mar2025_Apr2025_removed.pdf", 1, 7),
+]
+
+TEXT_LAYER_PAGE = """Date
+Transaction Details
+Type
+Amount
+Apr 06, 2025
+11:22 AM
+DEBIT
+₹30
+Paid to ROHIT KUSHWAH
+Transaction ID T2504061122541440101225
+UTR No. 549583778888
+Paid by
+XXXXXXXXXXX9646
+Apr 05, 2025
+10:00 PM
+DEBIT
+₹1,250.50
+Paid to Rajkumar vegetables
+Transaction ID T2504052200299962849771
+UTR No. 531752362347
+Paid by
+XXXXXXXXXXX9646
+"""
+
+OCR_PAGE = """Apr 06,2025 Paid to ROHIT KUSHWAH DEBIT ₹30
+Transaction ID T2504061122541440101225
+Apr 05,2025 Paid to Rajkumar vegetables DEBIT {1,250.50
+"""
+
+
+def test_parses_text_layer_order():
+    transactions, rejected = statement_pipeline.parse_transactions(TEXT_LAYER_PAGE, "text")
+    assert rejected == []
+    assert transactions == [
+        {"date": "2025-04-06", "description": "Paid to ROHIT KUSHWAH", "amount": 30.0},
+        {"date": "2025-04-05", "description": "Paid to Rajkumar vegetables", "amount": 1250.5},
+    ]
+
+
+def test_parses_ocr_order():
+    transactions, _rejected = statement_pipeline.parse_transactions(OCR_PAGE, "ocr")
+    assert [(t["date"], t["description"], t["amount"]) for t in transactions] == [
+        ("2025-04-06", "Paid to ROHIT KUSHWAH", 30.0),
+        ("2025-04-05", "Paid to Rajkumar vegetables", 1250.5),
+    ]
+
+
+def test_falls_back_to_the_other_reading_order():
+    assert len(statement_pipeline.parse_transactions(TEXT_LAYER_PAGE, "ocr")[0]) == 2
+    assert len(statement_pipeline.parse_transactions(OCR_PAGE, "text")[0]) == 2
+
+
+@pytest.mark.parametrize("filename,pages,expected", SAMPLES)
+def test_bundled_statements_skip_ocr(monkeypatch, filename, pages, expected):
+    def no_ocr(*args, **kwargs):
+        raise AssertionError("text layer pages were sent to OCR")
+
+    monkeypatch.setattr(statement_pipeline, "iter_ocr_pages", no_ocr)
+    results = list(statement_pipeline.stream_statement(os.path.join(ROOT, filename)))
+    assert [result["source"] for result in results] == ["text"] * pages
+    assert sum(len(result["transactions"]) for result in results) == expected
+    assert all(not result["rejected"] for result in results)
+
+
+def test_unreadable_text_layer_sends_every_page_to_ocr(monkeypatch):
+    def broken(pdf_path):
+        raise ValueError("damaged xref")
+
+    monkeypatch.setattr(statement_pipeline, "iter_text_layer", broken)
+    monkeypatch.setattr(statement_pipeline, "page_count", lambda pdf_path: 2)
+    monkeypatch.setattr(statement_pipeline, "iter_ocr_pages",
+                        lambda pdf_path, pages, **kwargs: [(page_no, OCR_PAGE) for page_no in pages])
+    results = list(statement_pipeline.stream_statement("statement.pdf"))
+    assert [(result["page"], result["source"]) for result in results] == [(1, "ocr"), (2, "ocr")]
+
+
+def test_failure_after_a_yield_does_not_ocr_pages_again(monkeypatch):
+    def no_ocr(*args, **kwargs):
+        raise AssertionError("yielded pages were sent to OCR")
+
+    monkeypatch.setattr(statement_pipeline, "iter_text_layer", lambda pdf_path: [(1, TEXT_LAYER_PAGE), (2, TEXT_LAYER_PAGE)])
+    monkeypatch.setattr(statement_pipeline, "iter_ocr_pages", no_ocr)
+    stream = statement_pipeline.stream_statement("statement.pdf")
+    assert next(stream)["page"] == 1
+    with pytest.raises(RuntimeError):
+        stream.throw(RuntimeError("consumer failed"))
+
+
+class FakeEngine:
+    def readtext(self, pixels, detail=0):
+        return ["line"]
+
+
+@pytest.mark.parametrize("settings,stages", [(None, ["ocr"]), ({}, ["preprocess", "ocr"])])
+def test_preprocess_is_timed_only_when_it_runs(monkeypatch, settings, stages):
+    from PIL import Image
+
+    monkeypatch.setattr(statement_pipeline, "_worker_engine", FakeEngine())
+    monkeypatch.setattr(statement_pipeline, "PREPROCESS_SETTINGS", settings)
+    monkeypatch.setattr(statement_pipeline.preprocess, "preprocess", lambda image, settings: (image, {}))
+    timings = []
+    statement_pipeline._read_page(Image.new("RGB", (20, 20), "white"), timings)
+    assert [stage for stage, _seconds in timings] == stages
+
+
+def test_ocr_stats_report_busy_and_idle_workers(monkeypatch):
+    monkeypatch.setattr(statement_pipeline, "OCR_WORKERS", 4)
+    monkeypatch.setattr(statement_pipeline, "OCR_CACHE_PATH", "")
+    monkeypatch.setattr(statement_pipeline, "_started_at", time.monotonic() - 10)
+    before = statement_pipeline.ocr_stats()["busy_seconds_total"]
+    with statement_pipeline._busy():
+        stats = statement_pipeline.ocr_stats()
+        assert (stats["busy_workers"], stats["idle_workers"], stats["utilisation"]) == (1, 3, 0.25)
+        time.sleep(0.01)
+    stats = statement_pipeline.ocr_stats()
+    assert (stats["busy_workers"], stats["idle_workers"]) == (0, 4)
+    assert stats["busy_seconds_total"] > before
+    assert 0 < stats["utilisation_since_start"] < 1
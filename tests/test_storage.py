@@ -0,0 +1,176 @@
+import os
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime
+
+import pytest
+
+import records
+from chain_store import BlockConflict
+from storage import SQLiteStorage, open_storage
+
+
+def expense(user_id, amount, date, category="Food", **fields):
+    return records.normalize_expense({
+        "user_id": user_id,
+        "amount": amount,
+        "description": f"{category} on {date}",
+        "category": category,
+        "transaction_type": "UPI",
+        "date": date,
+        "created_at": f"{date} 09:30:00",
+        "block_hash": "pending",
+        **fields,
+    })
+
+
+def test_expense_round_trip(storage):
+    expense_id = storage.insert_expense(expense("alice", "12.50", "2025-03-04"))
+    stored = storage.get_expense("alice", storage.parse_id(str(expense_id)))
+    assert stored["_id"] == expense_id
+    assert stored["amount_paise"] == 1250
+    assert stored["date"] == datetime(2025, 3, 4)
+    assert stored["created_at"] == datetime(2025, 3, 4, 9, 30)
+    assert storage.get_expense("alice", expense_id, ["category"]) == {"_id": expense_id, "category": "Food"}
+    with pytest.raises(ValueError):
+        storage.parse_id("not-a-number")
+
+
+def test_expenses_are_scoped_to_their_owner(storage):
+    alice_id = storage.insert_expense(expense("alice", "10", "2025-03-01"))
+    storage.insert_expense(expense("bob", "99", "2025-03-01"))
+    assert storage.get_expense("bob", alice_id) is None
+
+    storage.mark_sealed("bob", [alice_id], "forged")
+    assert storage.get_expense("alice", alice_id)["block_hash"] == "pending"
+    storage.mark_sealed("alice", [alice_id], "abc")
+    assert storage.get_expense("alice", alice_id)["block_hash"] == "abc"
+
+    assert [row["amount_paise"] for row in storage.find_expenses({"user_id": "alice"})] == [1000]
+    assert storage.daily_totals({"user_id": "bob"}) == {"2025-03-01": 9900}
+
+
+def test_insert_expenses_skips_duplicate_fingerprints(storage):
+    batch = [
+        expense("alice", "10", "2025-03-01", fingerprint="a"),
+        expense("alice", "20", "2025-03-02", fingerprint="a"),
+        expense("bob", "30", "2025-03-03", fingerprint="a"),
+    ]
+    assert storage.insert_expenses(batch) == {1}
+    assert "_id" in batch[0] and "_id" not in batch[1]
+
+
+def test_totals_and_deletes(storage):
+    storage.insert_expenses([
+        expense("alice", "10", "2025-03-01", "Food"),
+        expense("alice", "5", "2025-03-01", "Transport"),
+        expense("alice", "7", "2025-03-02", "Food"),
+    ])
+    assert storage.category_totals({"user_id": "alice"}) == {"Food": 1700, "Transport": 500}
+    assert storage.expense_categories({"user_id": "alice"}) == ["Food", "Transport"]
+
+    deleted = storage.delete_expenses_on("alice", datetime(2025, 3, 1))
+    assert sorted(row["amount_paise"] for row in deleted) == [500, 1000]
+    assert storage.daily_totals({"user_id": "alice"}) == {"2025-03-02": 700}
+
+
+def test_rollups(storage):
+    storage.increment_rollups({("alice", "daily", "2025-03-01"): [1000, 1], ("bob", "daily", "2025-03-01"): [50, 1]})
+    storage.increment_rollups({("alice", "daily", "2025-03-01"): [250, 1]})
+    assert storage.rollup_totals("alice", "daily") == {"2025-03-01": 1250}
+
+    storage.increment_rollups({("alice", "daily", "2025-03-01"): [-1250, -2]})
+    assert storage.rollup_totals("alice", "daily") == {}
+
+    storage.replace_rollups({("bob", "category", "Food"): [700, 3]})
+    assert storage.rollup_totals("bob", "daily") == {}
+    assert storage.rollup_totals("bob", "category") == {"Food": 700}
+
+
+def test_budget_and_meta(storage):
+    assert storage.get_budget("alice") is None
+    storage.set_budget("alice", 500)
+    storage.set_budget("alice", 750)
+    storage.set_budget("bob", 100)
+    assert storage.get_budget("alice") == {"amount": 750}
+
+    assert storage.increment_meta("data_version:alice") == 1
+    assert storage.increment_meta("data_version:alice") == 2
+    storage.set_meta("state", {"a": 1})
+    storage.set_meta("state", {"b": 2})
+    assert storage.get_meta("state") == {"_id": "state", "a": 1, "b": 2}
+
+
+def test_jobs_and_imports(storage):
+    storage.insert_job({"_id": "j1", "status": "queued", "user_id": "alice"})
+    storage.insert_job({"_id": "j2", "status": "running", "user_id": "alice"})
+    storage.update_job("j1", {"status": "done", "rows": 3})
+    storage.record_job_error("j2", "page 2 unreadable", limit=1)
+    storage.record_job_error("j2", "page 3 unreadable", limit=1)
+    job = storage.get_job("j2")
+    assert job["errors"] == ["page 2 unreadable"]
+    assert job["error_count"] == 2
+
+    assert storage.fail_jobs(["queued", "running"], {"status": "failed"}, "restarted") == 1
+    assert storage.job_counts() == {"done": 1, "failed": 1}
+    assert storage.get_job("j1")["rows"] == 3
+
+    storage.save_import("fp", {"status": "done"})
+    storage.save_import("fp", {"job_id": "j1"})
+    assert storage.get_import("fp") == {"_id": "fp", "status": "done", "job_id": "j1"}
+
+
+def test_chain_store_rejects_a_second_block_at_an_index(storage):
+    block = {"index": 1, "timestamp": 1.0, "proof": 1, "previous_hash": "0", "merkle_root": "r", "transactions": [], "hash": "h1"}
+    storage.chain.save_block(block)
+    with pytest.raises(BlockConflict):
+        storage.chain.save_block(dict(block, hash="h2"))
+    assert storage.chain.find_by_hash("h1")["index"] == 1
+
+
+def test_prototype_database_is_upgraded(tmp_path):
+    path = str(tmp_path / "prototype.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE expenses (id INTEGER PRIMARY KEY, amount REAL, description TEXT, category TEXT, date TEXT, block_hash TEXT)")
+    conn.executemany("INSERT INTO expenses (amount, description, category, date, block_hash) VALUES (?, ?, ?, ?, ?)", [
+        (800.0, "travel", "Bills", "09032025", "h1"),
+        (50.5, "food", "Food", "2025-03-10", None),
+    ])
+    conn.commit()
+    conn.close()
+
+    storage = SQLiteStorage(path)
+    try:
+        assert storage.migrate_expenses()["migrated"] == 2
+        assert storage.migrate_users("user1")["expenses"] == 2
+        assert storage.daily_totals({"user_id": "user1"}) == {"2025-03-09": 80000, "2025-03-10": 5050}
+        assert storage.migrate_expenses()["migrated"] == 2
+    finally:
+        storage.close()
+
+
+def test_sqlite_default_path_is_not_the_tracked_prototype(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("SQLITE_PATH", raising=False)
+    storage = open_storage("sqlite")
+    try:
+        assert storage.path == "expense_tracker.db"
+        assert os.path.exists(tmp_path / "expense_tracker.db")
+    finally:
+        storage.close()
+
+
+def test_sqlite_backend_needs_no_mongo_driver(tmp_path):
+    # A None entry in sys.modules makes the import fail as if the package were missing.
+    script = (
+        "import sys\n"
+        "sys.modules.update(pymongo=None, bson=None)\n"
+        "import blockchain, storage\n"
+        f"store = storage.SQLiteStorage({str(tmp_path / 'chain.db')!r})\n"
+        "chain = blockchain.Blockchain(store=store.chain)\n"
+        "chain.add_transaction({'amount': 1.0})\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr